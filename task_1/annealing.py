@@ -0,0 +1,161 @@
+"""
+Параллельный отжиг (simulated annealing) для маршрута почтальона.
+
+Несколько независимых «островов» отжига работают в пуле процессов эпохами.
+После каждой эпохи лучший маршрут переходит на соседний остров (миграция по кругу).
+Результат зависит только от seed и числа островов, но не от числа процессов,
+если поиск не остановлен по времени.
+"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import exp, hypot
+
+import numpy as np
+
+from heuristics import local_search, nearest_neighbour_tour_large, neighbour_lists, tour_segments
+
+_coords = None  # координаты точек в процессе-работнике
+MIN_TEMPERATURE = 1e-9  # начальная температура не бывает нулевой
+
+
+def _init_worker(coords: list):
+    global _coords
+    _coords = coords
+
+
+def _tour_length(tour: list, xs: list, ys: list) -> float:
+    return sum(hypot(xs[a] - xs[b], ys[a] - ys[b]) for a, b in zip(tour, tour[1:] + tour[:1]))
+
+
+def _anneal(task: tuple):
+    """
+    Одна эпоха отжига на одном острове.
+    Ход – разворот случайного отрезка, точка 0 остаётся в начале маршрута.
+    :param task: (маршрут, seed, число ходов, начальная температура, конечная температура, длина отрезка,
+        секунды до остановки или None)
+    :return: (длина маршрута, маршрут)
+    """
+    tour, seed, moves, t_start, t_end, max_segment, time_left = task
+    # срок считается в самом процессе: отсчёт perf_counter в разных процессах не обязан совпадать
+    deadline = None if time_left is None else time.perf_counter() + time_left
+    xs, ys = _coords
+    count = len(tour)
+    rnd = random.Random(seed)
+    length = _tour_length(tour, xs, ys)
+    if count < 4:
+        return length, tour
+
+    best_length, best_tour = length, list(tour)
+    cooling = (t_end / t_start) ** (1 / moves)
+    temperature = t_start
+    for move in range(moves):
+        # время проверяется не на каждом ходу, perf_counter дороже самого хода
+        if deadline is not None and move & 1023 == 0 and time.perf_counter() > deadline:
+            break
+        i = rnd.randint(1, count - 2)
+        j = min(count - 1, i + rnd.randint(1, max_segment))
+        a, b, c, d = tour[i - 1], tour[i], tour[j], tour[(j + 1) % count]
+        delta = (
+            hypot(xs[a] - xs[c], ys[a] - ys[c])
+            + hypot(xs[b] - xs[d], ys[b] - ys[d])
+            - hypot(xs[a] - xs[b], ys[a] - ys[b])
+            - hypot(xs[c] - xs[d], ys[c] - ys[d])
+        )
+        if delta < 0 or rnd.random() < exp(-delta / temperature):
+            tour[i : j + 1] = tour[i : j + 1][::-1]
+            length += delta
+            if length < best_length - 1e-12:
+                best_length, best_tour = length, list(tour)
+        temperature *= cooling
+    return _tour_length(best_tour, xs, ys), best_tour
+
+
+def calculate_path_annealing(
+    coords: np.ndarray,
+    islands: int = 4,
+    workers: int = None,
+    epochs: int = 20,
+    moves: int = 20000,
+    seed: int = 0,
+    time_limit: float = None,
+):
+    """
+    Маршрут параллельным отжигом на островах с миграцией лучшего маршрута.
+    :param coords: массив (n, 2), маршрут начинается в точке 0
+    :param islands: число независимых островов отжига
+    :param workers: число процессов, по умолчанию равно islands
+    :param epochs: число эпох, после каждой происходит миграция
+    :param moves: число ходов отжига на острове за эпоху
+    :param seed: зерно генератора случайных чисел
+    :param time_limit: ограничение по времени в секундах, проверяется и внутри эпохи
+    :return: (длина маршрута, [(индекс точки, длина участка), ...])
+    """
+    start = time.perf_counter()
+    coords = np.asarray(coords, dtype=np.float64)
+    count = len(coords)
+    xs, ys = coords[:, 0].tolist(), coords[:, 1].tolist()
+    neighbours = neighbour_lists(coords)
+    time_left = None if time_limit is None else time_limit - (time.perf_counter() - start)
+    tour = local_search(nearest_neighbour_tour_large(coords, neighbours), coords, neighbours, time_left)
+    best_length, best_tour = _tour_length(tour, xs, ys), tour
+    if count < 4 or best_length == 0:
+        return tour_segments(best_tour, coords)  # улучшать нечего
+
+    # температура: от доли средней длины ребра до почти нуля за весь поиск
+    t_start = max(0.3 * best_length / count, MIN_TEMPERATURE)
+    t_end = t_start / 1000
+    epoch_ratio = (t_end / t_start) ** (1 / epochs)
+    max_segment = max(1, min(count // 2, 100))
+
+    tours = [list(tour) for _ in range(islands)]
+    with ProcessPoolExecutor(workers or islands, initializer=_init_worker, initargs=((xs, ys),)) as pool:
+        for epoch in range(epochs):
+            time_left = None if time_limit is None else time_limit - (time.perf_counter() - start)
+            if time_left is not None and time_left <= 0:
+                break
+            temperature = t_start * epoch_ratio**epoch
+            tasks = [
+                (tours[island], seed * 1_000_003 + epoch * islands + island, moves, temperature,
+                 temperature * epoch_ratio, max_segment, time_left)
+                for island in range(islands)
+            ]
+            results = list(pool.map(_anneal, tasks))
+            for length, island_tour in results:
+                if length < best_length - 1e-12:
+                    best_length, best_tour = length, island_tour
+            # миграция: каждый остров получает маршрут соседа, если тот лучше
+            tours = [
+                results[island - 1][1] if results[island - 1][0] < results[island][0] else results[island][1]
+                for island in range(islands)
+            ]
+
+    return tour_segments(best_tour, coords)
+
+
+def measure_speedup(coords: np.ndarray, worker_counts=(1, 2, 4), **kwargs) -> list:
+    """
+    Решает одну и ту же задачу с разным числом процессов.
+    :return: список словарей {"workers", "seconds", "speedup", "path_size"}
+    """
+    rows = []
+    for workers in worker_counts:
+        start = time.perf_counter()
+        path_size, _ = calculate_path_annealing(coords, workers=workers, **kwargs)
+        rows.append({"workers": workers, "seconds": time.perf_counter() - start, "path_size": path_size})
+    for row in rows:
+        row["speedup"] = rows[0]["seconds"] / row["seconds"]
+    return rows
+
+
+def main():
+    coords = np.random.default_rng(0).random((500, 2))
+    for row in measure_speedup(coords, islands=4, epochs=10, moves=50000):
+        print(
+            f"workers={row['workers']}: {row['seconds']:.2f} s, "
+            f"speedup {row['speedup']:.2f}, path {row['path_size']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Быстрые приближённые маршруты с гарантией качества.
+
+Маршрут строится по минимальному остовному дереву: обход дерева в глубину
+(double-tree, не длиннее 2 * оптимума) или дерево плюс паросочетание нечётных
+вершин (Кристофидес, не длиннее 1.5 * оптимума при точном паросочетании).
+Вместе с маршрутом считается нижняя граница Held-Karp по 1-деревьям, так что
+для каждого ответа известно, насколько он может быть хуже оптимального.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from branch_and_bound import held_karp_penalties
+from route import tour_length, tour_to_result
+
+EXACT_MATCHING_LIMIT = 16  # до стольких нечётных вершин паросочетание ищется точно
+
+
+def minimum_spanning_tree(distances: np.ndarray) -> list:
+    """Минимальное остовное дерево алгоритмом Прима за O(n²), список рёбер (родитель, вершина)"""
+    count = len(distances)
+    in_tree = np.zeros(count, dtype=bool)
+    in_tree[0] = True
+    key = distances[0].astype(np.float64)
+    parent = np.zeros(count, dtype=np.int64)
+    key[0] = np.inf
+    edges = []
+    for _ in range(count - 1):
+        j = int(key.argmin())
+        edges.append((int(parent[j]), j))
+        in_tree[j] = True
+        closer = distances[j] < key
+        parent[closer] = j
+        key = np.minimum(key, distances[j])
+        key[in_tree] = np.inf
+    return edges
+
+
+def _shortcut(walk: list) -> list:
+    """Убирает повторные посещения из обхода"""
+    seen = set()
+    return [point for point in walk if not (point in seen or seen.add(point))]
+
+
+def double_tree_tour(distances: np.ndarray) -> list:
+    """Обход минимального остовного дерева в глубину из точки 0"""
+    children = [[] for _ in range(len(distances))]
+    for parent, child in minimum_spanning_tree(distances):
+        children[parent].append(child)
+    tour, stack = [], [0]
+    while stack:
+        point = stack.pop()
+        tour.append(point)
+        stack.extend(reversed(children[point]))
+    return tour
+
+
+def _exact_matching(odd: list, distances: np.ndarray) -> list:
+    """Паросочетание минимального веса динамикой по подмножествам"""
+    rows = distances[np.ix_(odd, odd)].tolist()
+    size = len(odd)
+
+    @lru_cache(maxsize=None)
+    def best(mask: int):
+        if mask == 0:
+            return 0.0, ()
+        i = (mask & -mask).bit_length() - 1
+        rest = mask ^ (1 << i)
+        result = None
+        for j in range(i + 1, size):
+            if rest & (1 << j):
+                weight, pairs = best(rest ^ (1 << j))
+                weight += rows[i][j]
+                if result is None or weight < result[0]:
+                    result = weight, pairs + ((i, j),)
+        return result
+
+    pairs = best((1 << size) - 1)[1]
+    best.cache_clear()
+    return [(odd[i], odd[j]) for i, j in pairs]
+
+
+def _greedy_matching(odd: list, distances: np.ndarray) -> list:
+    """Жадное паросочетание: пары берутся по возрастанию расстояния"""
+    sub = distances[np.ix_(odd, odd)]
+    first, second = np.triu_indices(len(odd), k=1)
+    matched = set()
+    pairs = []
+    for index in np.argsort(sub[first, second], kind="stable").tolist():
+        i, j = int(first[index]), int(second[index])
+        if i not in matched and j not in matched:
+            matched.update((i, j))
+            pairs.append((odd[i], odd[j]))
+    return pairs
+
+
+def christofides_tour(distances: np.ndarray):
+    """
+    Дерево плюс паросочетание нечётных вершин, эйлеров цикл и срез повторов.
+    :return: (маршрут, гарантированное отношение к оптимуму или None при жадном паросочетании)
+    """
+    count = len(distances)
+    edges = minimum_spanning_tree(distances)
+    degree = [0] * count
+    for parent, child in edges:
+        degree[parent] += 1
+        degree[child] += 1
+    odd = [point for point in range(count) if degree[point] % 2]
+    if len(odd) <= EXACT_MATCHING_LIMIT:
+        edges += _exact_matching(odd, distances)
+        guarantee = 1.5
+    else:
+        edges += _greedy_matching(odd, distances)
+        guarantee = None
+
+    # эйлеров цикл алгоритмом Хирхольцера
+    adjacency = [[] for _ in range(count)]
+    for number, (a, b) in enumerate(edges):
+        adjacency[a].append((b, number))
+        adjacency[b].append((a, number))
+    used = [False] * len(edges)
+    stack, walk = [0], []
+    while stack:
+        point = stack[-1]
+        while adjacency[point] and used[adjacency[point][-1][1]]:
+            adjacency[point].pop()
+        if adjacency[point]:
+            following, number = adjacency[point].pop()
+            used[number] = True
+            stack.append(following)
+        else:
+            walk.append(stack.pop())
+    return _shortcut(walk[::-1]), guarantee
+
+
+def calculate_path_approximation(distances: np.ndarray, method: str = "christofides", iterations: int = 50):
+    """
+    Приближённый маршрут с нижней границей.
+    :param method: "christofides" или "double_tree"
+    :param iterations: шаги подбора штрафов для нижней границы Held-Karp
+    :return: (длина маршрута, [(индекс точки, длина участка), ...], report), где
+        report = {"lower_bound": нижняя граница длины, "gap": во сколько раз маршрут
+        может быть длиннее оптимума минус 1, "guarantee": априорная гарантия метода}
+    """
+    count = len(distances)
+    if method == "double_tree":
+        tour, guarantee = double_tree_tour(distances), 2.0
+    elif method == "christofides":
+        tour, guarantee = christofides_tour(distances)
+    else:
+        raise ValueError(f"Unknown approximation method: {method}")
+
+    path_size, result = tour_to_result(tour, distances)
+    if count > 2:
+        lower_bound = held_karp_penalties(distances, tour_length(tour, distances), iterations)[1]
+    else:
+        lower_bound = path_size
+    lower_bound = min(lower_bound, path_size)
+    report = {
+        "lower_bound": lower_bound,
+        "gap": path_size / lower_bound - 1 if lower_bound > 0 else 0.0,
+        "guarantee": guarantee,
+    }
+    return path_size, result, report
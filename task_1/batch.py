@@ -0,0 +1,156 @@
+"""
+Пакетное решение множества небольших задач почтальона.
+
+Задачи читаются потоком из JSONL или CSV, решаются в пуле процессов пачками
+и записываются потоком в том же порядке. Одновременно в памяти держится
+не больше max_pending пачек, поэтому память не растёт с числом задач.
+
+Форматы входа:
+* JSONL – по строке на задачу: {"id": "courier-1", "points": [[0, 2], [2, 5], ...]}
+* CSV – строки id,x,y; строки одной задачи идут подряд, первая точка – почтовое отделение
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby, islice
+from math import floor, log
+
+from postman_v2 import calculate_path
+
+LATENCY_STEP = 1.05  # шаг гистограммы задержек: процентили считаются с точностью 5%
+
+
+def read_jsonl(lines):
+    """Задачи из строк JSONL"""
+    for number, line in enumerate(lines):
+        line = line.strip()
+        if line:
+            record = json.loads(line)
+            yield record.get("id", number), [tuple(point) for point in record["points"]]
+
+
+def read_csv(lines):
+    """Задачи из строк CSV вида id,x,y, точки одной задачи идут подряд"""
+    rows = (row for row in csv.reader(lines) if row and row[0] != "id")
+    for instance_id, group in groupby(rows, key=lambda row: row[0]):
+        yield instance_id, [(float(row[1]), float(row[2])) for row in group]
+
+
+def read_instances(path: str):
+    """Читает задачи из файла, формат определяется по расширению"""
+    reader = read_csv if path.endswith(".csv") else read_jsonl
+    with open(path, newline="") as file:
+        yield from reader(file)
+
+
+def _solve_chunk(chunk: list) -> list:
+    results = []
+    for instance_id, points in chunk:
+        start = time.perf_counter()
+        path_size, result = calculate_path(points)
+        seconds = time.perf_counter() - start
+        route = [list(points[0])] + [list(point) for point, _ in result]
+        results.append({"id": instance_id, "path_size": path_size, "route": route, "seconds": seconds})
+    return results
+
+
+def _chunks(instances, chunk_size: int):
+    instances = iter(instances)
+    while chunk := list(islice(instances, chunk_size)):
+        yield chunk
+
+
+class LatencyStats:
+    """Число задач, скорость и процентили задержки по логарифмической гистограмме"""
+
+    def __init__(self):
+        self.count = 0
+        self.buckets = Counter()
+        self.start = time.perf_counter()
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.buckets[floor(log(max(seconds, 1e-9)) / log(LATENCY_STEP))] += 1
+
+    def percentile(self, share: float) -> float:
+        """Верхняя граница корзины, в которую попадает доля share задач"""
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= share * self.count:
+                return LATENCY_STEP ** (bucket + 1)
+        return 0.0
+
+    def report(self) -> dict:
+        elapsed = time.perf_counter() - self.start
+        return {
+            "instances": self.count,
+            "seconds": elapsed,
+            "instances_per_second": self.count / elapsed if elapsed > 0 else 0.0,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+        }
+
+
+def solve_stream(instances, workers: int = None, chunk_size: int = 64, max_pending: int = None, stats=None):
+    """
+    Решает задачи в пуле процессов и отдаёт результаты в порядке входа.
+    :param instances: итератор пар (id, список точек)
+    :param chunk_size: сколько задач отправлять в процесс за раз
+    :param max_pending: сколько пачек может решаться одновременно, по умолчанию 2 на процесс
+    :param stats: LatencyStats для сбора статистики
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in _chunks(instances, chunk_size):
+            pending.append(pool.submit(_solve_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from _finish(pending.popleft(), stats)
+        while pending:
+            yield from _finish(pending.popleft(), stats)
+
+
+def _finish(future, stats):
+    for result in future.result():
+        if stats is not None:
+            stats.add(result["seconds"])
+        yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетный расчёт маршрутов почтальона")
+    parser.add_argument("input", help="файл задач .jsonl или .csv")
+    parser.add_argument("output", help="файл результатов .jsonl, '-' – стандартный вывод")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    stats = LatencyStats()
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for result in solve_stream(read_instances(args.input), args.workers, args.chunk_size, stats=stats):
+            output.write(json.dumps(result) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    report = stats.report()
+    print(
+        f"{report['instances']} instances in {report['seconds']:.2f} s, "
+        f"{report['instances_per_second']:.1f} instances/s, "
+        f"latency p50 {report['p50'] * 1000:.2f} ms, p90 {report['p90'] * 1000:.2f} ms, "
+        f"p99 {report['p99'] * 1000:.2f} ms",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
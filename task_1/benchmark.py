@@ -0,0 +1,149 @@
+"""
+Замеры решателей маршрута почтальона.
+
+Для каждого размера задачи и каждой раскладки (равномерной и кластерной)
+строятся задачи с фиксированным seed, каждый решатель запускается на них
+с замером времени и пиковой памяти (tracemalloc). Точные решатели обязаны
+давать одну и ту же длину маршрута. Результаты пишутся в JSON для сравнения
+между коммитами.
+
+Запуск: python benchmark.py --sizes 8 10 12 --output bench.json
+Цель эвристики: python benchmark.py --sizes 10000 --solvers heuristic
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from io import StringIO
+
+import numpy as np
+
+from branch_and_bound import calculate_path_branch_and_bound
+from distance import distance_matrix
+from heuristics import calculate_path_heuristic
+from postman_v2 import calculate_path_exhaustive, calculate_path_held_karp, calculate_path_rec
+
+with redirect_stdout(StringIO()):
+    import postman  # скрипт печатает маршрут при импорте
+
+
+def uniform_instance(count: int, seed: int) -> list:
+    rnd = random.Random(seed)
+    return [(rnd.uniform(0, 100), rnd.uniform(0, 100)) for _ in range(count)]
+
+
+def clustered_instance(count: int, seed: int, clusters: int = 3) -> list:
+    rnd = random.Random(seed)
+    centers = [(rnd.uniform(0, 100), rnd.uniform(0, 100)) for _ in range(clusters)]
+    points = []
+    for _ in range(count):
+        x, y = rnd.choice(centers)
+        points.append((rnd.gauss(x, 5), rnd.gauss(y, 5)))
+    return points
+
+
+LAYOUTS = {
+    "uniform": uniform_instance,
+    "clustered": clustered_instance,
+}
+
+
+def _postman_v1(data: list):
+    """Исходный postman.py: проходит точки в заданном порядке"""
+    postman.points = list(data)
+    postman.start_point = data[0]
+    with redirect_stdout(StringIO()) as output:
+        postman.finding_short_path()
+    return float(output.getvalue().rsplit("=", 1)[1])
+
+
+# имя: (функция от списка точек -> длина маршрута, точный ли, максимум точек)
+SOLVERS = {
+    "postman_v1": (_postman_v1, False, None),
+    "recursive": (lambda data: calculate_path_rec(data[0], data[0], data[1:], [], 0)[0], True, 9),
+    "exhaustive": (lambda data: calculate_path_exhaustive(distance_matrix(data))[0], True, 12),
+    "held_karp": (lambda data: calculate_path_held_karp(distance_matrix(data))[0], True, 18),
+    "branch_and_bound": (lambda data: calculate_path_branch_and_bound(distance_matrix(data))[0], True, 40),
+    "heuristic": (lambda data: calculate_path_heuristic(np.asarray(data))[0], False, None),
+}
+
+# (решатель, число точек): цель по времени в секундах, при превышении запись помечается
+TARGETS = {
+    ("heuristic", 10000): 1.0,
+}
+
+
+def measure(solver, data: list) -> dict:
+    """Время и память меряются разными запусками: tracemalloc сильно замедляет код"""
+    start = time.perf_counter()
+    path_size = solver(data)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    solver(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak, "path_size": path_size}
+
+
+def run(sizes, layouts=tuple(LAYOUTS), solvers=tuple(SOLVERS), seeds=(0,)) -> list:
+    """
+    :return: список записей {"solver", "layout", "size", "seed", "seconds", "peak_bytes", "path_size"}
+    :raise AssertionError: если точные решатели нашли маршруты разной длины
+    """
+    records = []
+    for size in sizes:
+        for layout in layouts:
+            for seed in seeds:
+                data = LAYOUTS[layout](size, seed)
+                exact_lengths = {}
+                for name in solvers:
+                    solver, exact, limit = SOLVERS[name]
+                    if limit is not None and size > limit:
+                        continue
+                    record = {"solver": name, "layout": layout, "size": size, "seed": seed}
+                    record.update(measure(solver, data))
+                    target = TARGETS.get((name, size))
+                    if target is not None:
+                        record["target_seconds"] = target
+                    records.append(record)
+                    if exact:
+                        exact_lengths[name] = record["path_size"]
+                lengths = list(exact_lengths.values())
+                if lengths and max(lengths) - min(lengths) > 1e-9 * max(lengths):
+                    raise AssertionError(f"Exact solvers disagree on {layout} n={size} seed={seed}: {exact_lengths}")
+    return records
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры решателей маршрута почтальона")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[6, 8, 10, 12])
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--solvers", nargs="+", default=list(SOLVERS), choices=list(SOLVERS))
+    parser.add_argument("--output", default="bench.json")
+    args = parser.parse_args(argv)
+
+    records = run(args.sizes, solvers=args.solvers, seeds=args.seeds)
+    for record in records:
+        print(
+            f"{record['solver']:>16} {record['layout']:>9} n={record['size']:<3} "
+            f"{record['seconds'] * 1000:10.2f} ms {record['peak_bytes'] / 1024:10.1f} KiB "
+            f"{record['path_size']:.6f}"
+            + (" over target" if record["seconds"] > record.get("target_seconds", float("inf")) else "")
+        )
+    with open(args.output, "w") as file:
+        json.dump({"commit": _commit(), "python": platform.python_version(), "records": records}, file, indent=1)
+
+
+if __name__ == "__main__":
+    main()
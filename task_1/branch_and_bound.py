@@ -0,0 +1,194 @@
+"""
+Точный метод ветвей и границ для маршрута почтальона на 20–40 точек.
+
+Нижняя граница ветки – длина уже построенной части маршрута плюс
+минимальное остовное дерево оставшихся точек и два самых коротких ребра,
+соединяющих их с концом пути и с почтовым отделением (аналог 1-дерева).
+Перед поиском веса рёбер сдвигаются штрафами Held-Karp (d[i, j] + p[i] + p[j]):
+длина любого маршрута от этого растёт ровно на 2 * sum(p), а граница становится точнее.
+"""
+import heapq
+import time
+from itertools import count as counter
+
+import numpy as np
+
+from heuristics import nearest_neighbour_tour, two_opt
+from route import tour_length, tour_to_result
+
+
+def mst_weight(distances: np.ndarray, nodes: np.ndarray) -> float:
+    """Вес минимального остовного дерева на точках nodes (алгоритм Прима)"""
+    size = len(nodes)
+    if size <= 1:
+        return 0.0
+    sub = distances[np.ix_(nodes, nodes)]
+    in_tree = np.zeros(size, dtype=bool)
+    in_tree[0] = True
+    key = sub[0].copy()
+    key[0] = np.inf
+    weight = 0.0
+    for _ in range(size - 1):
+        j = int(key.argmin())
+        weight += key[j]
+        in_tree[j] = True
+        key = np.minimum(key, sub[j])
+        key[in_tree] = np.inf
+    return float(weight)
+
+
+def one_tree(distances: np.ndarray):
+    """
+    1-дерево: MST на точках 1..n-1 плюс два кратчайших ребра из точки 0.
+    :return: (вес 1-дерева, степени вершин)
+    """
+    count = len(distances)
+    degrees = np.zeros(count, dtype=np.int64)
+    nearest = np.argsort(distances[0, 1:])[:2] + 1
+    degrees[0] = 2
+    degrees[nearest] += 1
+    weight = float(distances[0, nearest].sum())
+
+    in_tree = np.zeros(count, dtype=bool)
+    in_tree[:2] = True
+    key = distances[1].copy()
+    parent = np.ones(count, dtype=np.int64)
+    key[in_tree] = np.inf
+    for _ in range(count - 2):
+        j = int(key.argmin())
+        weight += key[j]
+        degrees[j] += 1
+        degrees[parent[j]] += 1
+        in_tree[j] = True
+        closer = distances[j] < key
+        parent[closer] = j
+        key = np.minimum(key, distances[j])
+        key[in_tree] = np.inf
+    return weight, degrees
+
+
+def held_karp_penalties(distances: np.ndarray, upper: float, iterations: int = 200):
+    """
+    Подбор штрафов вершин субградиентным методом (нижняя граница Held-Karp).
+    :param upper: длина известного маршрута, задаёт шаг
+    :return: (штрафы p, лучшая нижняя граница)
+    """
+    count = len(distances)
+    penalties = np.zeros(count)
+    best_penalties, best_bound = penalties, -np.inf
+    step = 2.0
+    stalled = 0
+    for _ in range(iterations):
+        weight, degrees = one_tree(distances + penalties[:, np.newaxis] + penalties[np.newaxis, :])
+        bound = weight - 2 * penalties.sum()
+        if bound > best_bound + 1e-12:
+            best_penalties, best_bound = penalties.copy(), bound
+            stalled = 0
+        else:
+            stalled += 1
+            if stalled >= 10:
+                step /= 2
+                stalled = 0
+        excess = degrees - 2
+        norm = float((excess**2).sum())
+        if norm == 0 or step < 1e-6:
+            break
+        penalties = penalties + step * (upper - bound) / norm * excess
+    return best_penalties, float(best_bound)
+
+
+def _path_bound(distances: np.ndarray, path_size: float, last: int, remaining: np.ndarray) -> float:
+    return (
+        path_size
+        + mst_weight(distances, remaining)
+        + float(distances[last, remaining].min())
+        + float(distances[0, remaining].min())
+    )
+
+
+def calculate_path_branch_and_bound(
+    distances: np.ndarray,
+    time_limit: float = None,
+    progress=None,
+    report_every: int = 1000,
+    stats=None,
+):
+    """
+    Поиск кратчайшего маршрута методом ветвей и границ, ветки раскрываются по возрастанию границы.
+    :param distances: матрица расстояний (n, n), маршрут начинается в точке 0
+    :param time_limit: ограничение по времени в секундах, после него возвращается лучший найденный маршрут
+    :param progress: функция progress(stats), вызывается каждые report_every раскрытых веток
+    :param report_every: как часто вызывать progress
+    :param stats: SearchStats для счётчиков раскрытых и отброшенных веток
+    :return: (длина маршрута, [(индекс точки, длина участка), ...], stats), где
+        stats = {"nodes": раскрыто веток, "lower_bound": нижняя граница,
+        "gap": относительный зазор до оптимума, "optimal": доказана ли оптимальность}
+    """
+    start = time.perf_counter()
+    count = len(distances)
+    best_tour = two_opt(nearest_neighbour_tour(distances), distances)
+    upper = tour_length(best_tour, distances)
+    eps = 1e-9 * max(upper, 1.0)
+    if count > 2:
+        penalties, lower = held_karp_penalties(distances, upper)
+    else:
+        penalties, lower = np.zeros(count), upper
+    # поиск идёт по сдвинутым весам, к настоящей длине возвращаемся через offset
+    reduced = distances + penalties[:, np.newaxis] + penalties[np.newaxis, :]
+    offset = 2 * float(penalties.sum())
+
+    def report(optimal: bool) -> dict:
+        bound = upper if optimal else min(lower, upper)
+        return {
+            "nodes": nodes,
+            "lower_bound": bound,
+            "gap": (upper - bound) / upper if upper > 0 else 0.0,
+            "optimal": optimal,
+        }
+
+    nodes = 0
+    pruned = 0
+    evaluations = 0
+    order = counter()
+    heap = [(lower + offset, 0, next(order), (0,), 0.0)]
+    optimal = True
+    while heap:
+        lower = heap[0][0] - offset
+        if lower >= upper - eps:
+            break
+        if time_limit is not None and time.perf_counter() - start > time_limit:
+            optimal = False
+            break
+        _, _, _, path, path_size = heapq.heappop(heap)
+        nodes += 1
+        if progress is not None and nodes % report_every == 0:
+            progress(report(False))
+
+        last = path[-1]
+        visited = np.zeros(count, dtype=bool)
+        visited[list(path)] = True
+        remaining = np.flatnonzero(~visited)
+        for point in remaining.tolist():
+            size = path_size + float(reduced[last, point])
+            if len(remaining) == 1:
+                size += float(reduced[point, 0])
+                if size - offset < upper:
+                    best_tour = list(path) + [point]
+                    upper = tour_length(best_tour, distances)
+                continue
+            bound = _path_bound(reduced, size, point, remaining[remaining != point])
+            evaluations += len(remaining) ** 2
+            if bound - offset < upper - eps:
+                heapq.heappush(heap, (bound, -len(path), next(order), path + (point,), size))
+            else:
+                pruned += 1
+
+    if stats is not None:
+        stats.nodes += nodes
+        stats.pruned += pruned + len(heap)
+        stats.distance_evaluations += evaluations
+    result_stats = report(optimal)
+    if progress is not None:
+        progress(result_stats)
+    path_size, result = tour_to_result(best_tour, distances)
+    return path_size, result, result_stats
@@ -0,0 +1,95 @@
+"""
+Кэш решённых задач почтальона.
+
+Ключ не зависит от порядка адресатов: хэш строится по почтовому отделению,
+отсортированному списку адресатов, метрике и настройкам решателя (режим и
+ограничение по времени), так что эвристический или прерванный по времени
+результат не выдаётся за точный. Недавние результаты хранятся
+в памяти (LRU), все – в файле sqlite, который переживает перезапуск.
+"""
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+
+from postman_v2 import calculate_path
+
+
+def instance_key(data: list, metric: str = "euclidean", mode: str = "auto", time_limit: float = None) -> str:
+    """
+    Канонический хэш задачи: порядок адресатов data[1:] не важен,
+    координаты приводятся к float, чтобы (1, 2) и (1.0, 2.0) давали один ключ
+    """
+    points = [[float(value) for value in point] for point in data]
+    canonical = [points[0], sorted(points[1:]), metric, mode, time_limit]
+    return hashlib.sha256(json.dumps(canonical).encode()).hexdigest()
+
+
+class RouteCache:
+    """LRU-кэш в памяти поверх хранилища sqlite."""
+
+    def __init__(self, path: str = None, max_size: int = 1024) -> None:
+        """
+        :param path: файл sqlite, без него кэш живёт только в памяти
+        :param max_size: сколько результатов держать в памяти
+        """
+        self.max_size = max_size
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.connection = None
+        if path is not None:
+            self.connection = sqlite3.connect(path)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _remember(self, key: str, value) -> None:
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def get(self, data: list, metric: str = "euclidean", mode: str = "auto", time_limit: float = None):
+        """:return: результат calculate_path или None, если задачи нет в кэше"""
+        key = instance_key(data, metric, mode, time_limit)
+        if key in self.memory:
+            self.hits += 1
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        if self.connection is not None:
+            row = self.connection.execute("SELECT value FROM routes WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                path_size, result = json.loads(row[0])
+                value = path_size, [(tuple(point), size) for point, size in result]
+                self._remember(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, data: list, value, metric: str = "euclidean", mode: str = "auto", time_limit: float = None) -> None:
+        key = instance_key(data, metric, mode, time_limit)
+        self._remember(key, value)
+        if self.connection is not None:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO routes (key, value) VALUES (?, ?)", (key, json.dumps(value))
+                )
+
+    def calculate_path(self, data: list, metric: str = "euclidean", time_limit: float = None, mode: str = "auto",
+                       stats=None):
+        """calculate_path с кэшем, результаты разных режимов и ограничений хранятся отдельно"""
+        value = self.get(data, metric, mode, time_limit)
+        if value is None:
+            value = calculate_path(data, metric, time_limit, mode, stats)
+            self.put(data, value, metric, mode, time_limit)
+        return value
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "size": len(self.memory)}
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,111 @@
+"""
+Разделение адресатов между несколькими почтальонами.
+
+Адресаты делятся на k групп примерно поровну (развёрткой по углу вокруг
+почтового отделения или k-средними с ограничением размера группы),
+после чего маршрут каждой группы считается отдельно в пуле процессов.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from math import atan2
+
+import numpy as np
+
+from postman_v2 import calculate_path, print_path
+
+
+def split_sweep(data: list, couriers: int) -> list:
+    """
+    Развёртка: адресаты сортируются по углу вокруг почтового отделения data[0]
+    и режутся на couriers последовательных групп, размеры которых отличаются не больше чем на 1.
+    """
+    office = data[0]
+    points = sorted(data[1:], key=lambda point: atan2(point[1] - office[1], point[0] - office[0]))
+    size, extra = divmod(len(points), couriers)
+    groups = []
+    start = 0
+    for index in range(couriers):
+        end = start + size + (index < extra)
+        groups.append(points[start:end])
+        start = end
+    return groups
+
+
+def split_kmeans(data: list, couriers: int, iterations: int = 20, seed: int = 0) -> list:
+    """
+    k-средних с ограничением размера: группы получают по m // k адресатов,
+    m % k из них ещё по одному, так что при m >= k пустых групп нет.
+    Точки распределяются жадно, начиная с самых близких к центрам пар.
+    """
+    points = np.asarray(data[1:], dtype=np.float64).reshape(-1, 2)
+    count = len(points)
+    if count == 0:
+        return [[] for _ in range(couriers)]
+    rng = np.random.default_rng(seed)
+    centers = points[rng.choice(count, size=min(couriers, count), replace=False)]
+    size, extra = divmod(count, len(centers))
+    labels = np.zeros(count, dtype=np.int64)
+    for _ in range(iterations):
+        distances = np.hypot(*(points[:, np.newaxis, :] - centers[np.newaxis, :, :]).transpose(2, 0, 1))
+        labels = np.full(count, -1, dtype=np.int64)
+        sizes = [0] * len(centers)
+        larger = 0  # групп, уже получивших size + 1 адресатов
+        for flat in np.argsort(distances, axis=None).tolist():
+            point, center = divmod(flat, len(centers))
+            if labels[point] != -1 or sizes[center] > size:
+                continue
+            if sizes[center] == size:
+                if larger == extra:
+                    continue
+                larger += 1
+            labels[point] = center
+            sizes[center] += 1
+        # у пустой группы центр остаётся прежним
+        new_centers = np.array([
+            points[labels == center].mean(axis=0) if sizes[center] else centers[center]
+            for center in range(len(centers))
+        ])
+        if np.allclose(new_centers, centers):
+            break
+        centers = new_centers
+    groups = [[data[index + 1] for index in np.flatnonzero(labels == center).tolist()] for center in range(couriers)]
+    return groups
+
+
+SPLITTERS = {
+    "sweep": split_sweep,
+    "kmeans": split_kmeans,
+}
+
+
+def calculate_routes(data: list, couriers: int, method: str = "sweep", workers: int = None):
+    """
+    Маршруты для нескольких почтальонов, выезжающих из data[0].
+    :param couriers: число почтальонов
+    :param method: способ разделения адресатов, ключ SPLITTERS
+    :param workers: число процессов для расчёта маршрутов
+    :return: (маршруты [(длина, [(точка, длина участка), ...]), ...], makespan, общая длина)
+    """
+    if method not in SPLITTERS:
+        raise ValueError(f"Unknown split method: {method}")
+    groups = [group for group in SPLITTERS[method](data, couriers) if group]
+    with ProcessPoolExecutor(workers) as pool:
+        routes = list(pool.map(calculate_path, [[data[0]] + group for group in groups]))
+    lengths = [path_size for path_size, _ in routes]
+    return routes, max(lengths, default=0.0), sum(lengths)
+
+
+def calculate_and_print_routes(data: list, couriers: int, method: str = "sweep"):
+    routes, makespan, total = calculate_routes(data, couriers, method)
+    for number, route in enumerate(routes, start=1):
+        print(f"{number}: ", end="")
+        print_path(data[0], route)
+    print(f"makespan = {makespan}, total = {total}")
+
+
+def main():
+    data = [(0, 2), (2, 5), (5, 2), (6, 6), (8, 3), (-3, 4), (-5, 1), (-2, -4), (3, -3)]
+    calculate_and_print_routes(data, 2)
+
+
+if __name__ == "__main__":
+    main()
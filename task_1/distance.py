@@ -0,0 +1,59 @@
+"""
+Матрицы расстояний между точками маршрута.
+
+Матрица строится один раз на весь набор точек через broadcasting NumPy,
+после чего все решатели берут расстояние по индексам: distances[i, j].
+"""
+import numpy as np
+
+EARTH_RADIUS = 6371.0  # км, для haversine
+
+
+def _coordinates(points, dtype) -> np.ndarray:
+    """Переводит список точек (x, y) в массив формы (n, 2)"""
+    return np.asarray(points, dtype=dtype).reshape(-1, 2)
+
+
+def euclidean(coords: np.ndarray) -> np.ndarray:
+    """Расстояние по прямой"""
+    diff = coords[:, np.newaxis, :] - coords[np.newaxis, :, :]
+    return np.sqrt((diff**2).sum(axis=-1))
+
+
+def manhattan(coords: np.ndarray) -> np.ndarray:
+    """Расстояние городских кварталов |dx| + |dy|"""
+    diff = coords[:, np.newaxis, :] - coords[np.newaxis, :, :]
+    return np.abs(diff).sum(axis=-1)
+
+
+def haversine(coords: np.ndarray) -> np.ndarray:
+    """
+    Расстояние по поверхности Земли в километрах.
+    Точки задаются как (широта, долгота) в градусах.
+    """
+    lat, lon = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    d_lat = lat[:, np.newaxis] - lat[np.newaxis, :]
+    d_lon = lon[:, np.newaxis] - lon[np.newaxis, :]
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat)[:, np.newaxis] * np.cos(lat)[np.newaxis, :] * np.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+METRICS = {
+    "euclidean": euclidean,
+    "manhattan": manhattan,
+    "haversine": haversine,
+}
+
+
+def distance_matrix(points, metric: str = "euclidean", dtype=np.float64) -> np.ndarray:
+    """
+    Строит матрицу попарных расстояний.
+    :param points: список точек (x, y)
+    :param metric: имя метрики из METRICS
+    :param dtype: np.float64 или np.float32 для экономии памяти
+    :return: непрерывный (C-contiguous) массив формы (n, n)
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric}")
+    coords = _coordinates(points, np.float64)
+    return np.ascontiguousarray(METRICS[metric](coords), dtype=dtype)
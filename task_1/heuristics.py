@@ -0,0 +1,372 @@
+"""
+Эвристики для построения и улучшения маршрута почтальона.
+"""
+import time
+from collections import deque
+from math import hypot
+
+import numpy as np
+
+from space_filling import space_filling_tour
+from stats import phase
+
+BLOCK_RADIUS = 2  # быстрый поиск соседей смотрит в квадрат 5 x 5 ячеек
+MAX_BLOCK_CELL_POINTS = 16  # при более плотных ячейках быстрый поиск требует слишком много памяти
+
+
+def nearest_neighbour_tour(distances: np.ndarray, start: int = 0) -> list:
+    """Жадный маршрут: каждый раз едем в ближайшую непосещённую точку"""
+    count = len(distances)
+    visited = np.zeros(count, dtype=bool)
+    visited[start] = True
+    tour = [start]
+    current = start
+    for _ in range(count - 1):
+        row = np.where(visited, np.inf, distances[current])
+        current = int(row.argmin())
+        visited[current] = True
+        tour.append(current)
+    return tour
+
+
+def two_opt(tour: list, distances: np.ndarray) -> list:
+    """
+    Улучшение маршрута разворотами отрезков (2-opt), пока есть улучшение.
+    Первая точка маршрута остаётся на месте.
+    """
+    tour = list(tour)
+    count = len(tour)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, count - 1):
+            a, b = tour[i - 1], tour[i]
+            for j in range(i + 1, count):
+                c, d = tour[j], tour[(j + 1) % count]
+                delta = distances[a, c] + distances[b, d] - distances[a, b] - distances[c, d]
+                if delta < -1e-12:
+                    tour[i : j + 1] = tour[i : j + 1][::-1]
+                    b = tour[i]
+                    improved = True
+    return tour
+
+
+def neighbour_lists(coords: np.ndarray, k: int = 8) -> list:
+    """
+    k ближайших соседей каждой точки через равномерную сетку.
+    Для каждой ячейки кандидаты берутся из соседних ячеек, кольцо расширяется,
+    пока кандидатов не станет больше k.
+    :param coords: массив (n, 2)
+    :return: список списков индексов соседей, от ближнего к дальнему
+    """
+    count = len(coords)
+    k = min(k, count - 1)
+    if k <= 0:
+        return [[] for _ in range(count)]
+
+    low = coords.min(axis=0)
+    span = float((coords.max(axis=0) - low).max()) or 1.0
+    side = max(1, int((count / 2) ** 0.5))  # в среднем около двух точек на ячейку
+    cells = np.minimum(((coords - low) / span * side).astype(np.int64), side - 1)
+    cell_id = cells[:, 0] * side + cells[:, 1]
+    order = np.argsort(cell_id, kind="stable")
+    sorted_id = cell_id[order]
+    bounds = np.searchsorted(sorted_id, np.arange(side * side + 1))
+
+    def cell_points(x_from, x_to, y_from, y_to):
+        parts = [
+            order[bounds[x * side + y_from] : bounds[x * side + y_to + 1]]
+            for x in range(max(x_from, 0), min(x_to, side - 1) + 1)
+        ]
+        return np.concatenate(parts) if parts else order[:0]
+
+    neighbours = [None] * count
+    # быстрый путь: для всех точек сразу кандидаты из блока ячеек BLOCK_RADIUS вокруг своей ячейки;
+    # ответ точен, если k-й сосед ближе края блока, остальные точки ищутся по кольцам ниже
+    slow_cells = set(np.unique(sorted_id).tolist())
+    per_cell = np.diff(bounds)
+    width = int(per_cell.max())
+    if width <= MAX_BLOCK_CELL_POINTS:
+        # лишняя пустая ячейка для клеток за краем поля и лишняя точка в бесконечности для пустых мест
+        table = np.full((side * side + 1, width), count, dtype=np.int64)
+        table[sorted_id, np.arange(count) - bounds[sorted_id]] = order
+        xs = np.append(coords[:, 0], np.inf)
+        ys = np.append(coords[:, 1], np.inf)
+        offsets = np.arange(-BLOCK_RADIUS, BLOCK_RADIUS + 1)
+        limit = (BLOCK_RADIUS * span / side) ** 2
+        slow_cells = set()
+        for chunk in range(0, count, 2048):
+            points = np.arange(chunk, min(chunk + 2048, count))
+            bx = cells[points, 0][:, None, None] + offsets[None, :, None]
+            by = cells[points, 1][:, None, None] + offsets[None, None, :]
+            inside = (bx >= 0) & (bx < side) & (by >= 0) & (by < side)
+            block = np.where(inside, bx * side + by, side * side).reshape(len(points), -1)
+            candidates = table[block].reshape(len(points), -1)
+            dx = xs[candidates] - xs[points][:, None]
+            dy = ys[candidates] - ys[points][:, None]
+            dist = dx * dx + dy * dy
+            dist[candidates == points[:, None]] = np.inf
+            nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            nearest_dist = np.take_along_axis(dist, nearest, axis=1)
+            ranked = np.take_along_axis(nearest, np.argsort(nearest_dist, axis=1, kind="stable"), axis=1)
+            exact = nearest_dist.max(axis=1) <= limit
+            rows = np.take_along_axis(candidates, ranked, axis=1).tolist()
+            for point, row, ok in zip(points.tolist(), rows, exact.tolist()):
+                if ok:
+                    neighbours[point] = row
+                else:
+                    slow_cells.add(int(cell_id[point]))
+
+    for cell in sorted(slow_cells):
+        x, y = divmod(cell, side)
+        points = order[bounds[cell] : bounds[cell + 1]]
+        ring = 1
+        while True:
+            candidates = cell_points(x - ring, x + ring, max(y - ring, 0), min(y + ring, side - 1))
+            if len(candidates) > k or ring >= side:
+                break
+            ring += 1
+        # ещё одно кольцо: соседи из угла ячейки могут лежать дальше найденных
+        candidates = cell_points(x - ring - 1, x + ring + 1, max(y - ring - 1, 0), min(y + ring + 1, side - 1))
+        diff = coords[points][:, np.newaxis, :] - coords[candidates][np.newaxis, :, :]
+        dist = (diff**2).sum(axis=-1)
+        dist[candidates[np.newaxis, :] == points[:, np.newaxis]] = np.inf
+        nearest = np.argsort(dist, axis=1)[:, :k]
+        for point, row in zip(points.tolist(), candidates[nearest].tolist()):
+            neighbours[point] = row
+    return neighbours
+
+
+def nearest_neighbour_tour_large(coords: np.ndarray, neighbours: list, start: int = 0) -> list:
+    """
+    Жадный маршрут для больших наборов точек: ближайшая непосещённая точка
+    ищется в списке соседей, и только если там всё посещено – среди всех точек.
+    """
+    count = len(coords)
+    visited = [False] * count
+    visited[start] = True
+    unvisited = np.ones(count, dtype=bool)
+    unvisited[start] = False
+    tour = [start]
+    current = start
+    for _ in range(count - 1):
+        for point in neighbours[current]:
+            if not visited[point]:
+                break
+        else:
+            left = np.flatnonzero(unvisited)
+            point = int(left[((coords[left] - coords[current]) ** 2).sum(axis=1).argmin()])
+        visited[point] = True
+        unvisited[point] = False
+        tour.append(point)
+        current = point
+    return tour
+
+
+def local_search(tour: list, coords: np.ndarray, neighbours: list, time_limit: float = None, stats=None) -> list:
+    """
+    Улучшение маршрута ходами 2-opt и Or-opt, см. iterate_local_search.
+    :param time_limit: ограничение по времени в секундах
+    :param stats: SearchStats, nodes – число проверенных точек
+    :return: улучшенный маршрут, начинающийся с той же точки
+    """
+    stop = None
+    if time_limit is not None:
+        deadline = time.monotonic() + time_limit
+
+        def stop():
+            return time.monotonic() >= deadline
+
+    tour = list(tour)
+    for tour, steps in iterate_local_search(tour, coords, neighbours, stop):
+        pass
+    if stats is not None:
+        stats.nodes += steps
+    return tour
+
+
+def iterate_local_search(tour: list, coords: np.ndarray, neighbours: list, stop=None, report_every: float = 0.05):
+    """
+    Улучшение маршрута ходами 2-opt и Or-opt (перенос отрезка из 1–3 точек),
+    рассматриваются только рёбра к ближайшим соседям. Точки, рядом с которыми
+    ничего не менялось, повторно не проверяются (don't-look bits).
+    :param stop: функция без аргументов, по True поиск прекращается
+    :param report_every: как часто (в секундах) отдавать улучшенный маршрут
+    :return: генератор пар (маршрут, число проверенных точек): сначала исходный маршрут, последней – итог
+    """
+    count = len(tour)
+    if count < 5:
+        yield list(tour), 0
+        return
+    first = tour[0]
+    tour = list(tour)
+    pos = [0] * count
+    for index, point in enumerate(tour):
+        pos[point] = index
+    xs, ys = coords[:, 0].tolist(), coords[:, 1].tolist()
+    # расстояния до соседей считаются один раз, numpy по всем спискам сразу
+    rows = np.asarray(neighbours, dtype=np.int64).reshape(count, -1)
+    near_dist = np.hypot(coords[rows, 0] - coords[:, 0:1], coords[rows, 1] - coords[:, 1:2]).tolist()
+    near = [list(zip(row, row_dist)) for row, row_dist in zip(neighbours, near_dist)]
+
+    def dist(a, b):
+        return hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    def succ(a):
+        return tour[(pos[a] + 1) % count]
+
+    def pred(a):
+        return tour[pos[a] - 1]
+
+    def reverse(i, j):
+        """Разворот отрезка позиций i..j по кругу"""
+        if i <= j:
+            segment = tour[i : j + 1][::-1]
+            tour[i : j + 1] = segment
+            for index, point in enumerate(segment, i):
+                pos[point] = index
+            return
+        segment = (tour[i:] + tour[: j + 1])[::-1]
+        split = count - i
+        tour[i:], tour[: j + 1] = segment[:split], segment[split:]
+        for index, point in enumerate(segment[:split], i):
+            pos[point] = index
+        for index, point in enumerate(segment[split:]):
+            pos[point] = index
+
+    def reverse_path(a, b):
+        """Разворот пути a..b по ходу маршрута или, если он длиннее, дополнения к нему"""
+        i, j = pos[a], pos[b]
+        if (j - i) % count + 1 <= count // 2:
+            reverse(i, j)
+        else:
+            reverse((j + 1) % count, (i - 1) % count)
+
+    def improve_two_opt(a):
+        for forward in (True, False):
+            b = succ(a) if forward else pred(a)
+            ab = dist(a, b)
+            for c, ac in near[a]:
+                if ac >= ab:
+                    break
+                d = succ(c) if forward else pred(c)
+                if c == b or d == a:
+                    continue
+                if ac + dist(b, d) - ab - dist(c, d) < -1e-10:
+                    if forward:
+                        reverse_path(b, c)
+                    else:
+                        reverse_path(a, d)
+                    return (a, b, c, d)
+        return None
+
+    def improve_or_opt(a):
+        for length in (1, 2, 3):
+            s1 = a
+            s2 = tour[(pos[a] + length - 1) % count]
+            p, nx = pred(s1), succ(s2)
+            if nx == p or nx == s1:
+                return None
+            removed = dist(p, s1) + dist(s2, nx) - dist(p, nx)
+            segment = {tour[(pos[a] + offset) % count] for offset in range(length)}
+            for end in (s1, s2):
+                for c, ce in near[end]:
+                    if ce >= removed:
+                        break
+                    if c in segment:
+                        continue
+                    for e in (succ(c), pred(c)):
+                        if e in segment:
+                            continue
+                        # вставка между c и e так, чтобы end оказался рядом с c
+                        other = s2 if end == s1 else s1
+                        added = ce + dist(other, e) - dist(c, e)
+                        if added - removed < -1e-10:
+                            move_segment(s1, s2, p, nx, c, e, end)
+                            return (p, nx, c, e, s1, s2)
+        return None
+
+    def move_segment(s1, s2, p, nx, c, e, end):
+        """Перенос отрезка s1..s2 между соседними точками c и e через развороты"""
+        # приводим к виду p [S] [M] y, где нужно получить p [M] [S'] y
+        after = e if succ(c) == e else c  # вторая точка ребра по ходу маршрута
+        before = c if after == e else e
+        if (pos[before] - pos[s2]) % count <= (pos[p] - pos[after]) % count:
+            # отрезок M = nx..before идёт после S
+            reverse(pos[s1], pos[before])  # p M^r S^r after
+            reverse(pos[before], pos[nx])  # p M S^r after
+            # сейчас before – s2 ... s1 – after
+            if (end == s2) != (before == c):
+                reverse(pos[s2], pos[s1])
+        else:
+            # отрезок M = after..p идёт перед S
+            reverse(pos[after], pos[s2])  # before S^r M^r nx
+            reverse(pos[p], pos[after])  # before S^r M nx
+            # сейчас before – s2 ... s1 – after
+            if (end == s2) != (before == c):
+                reverse(pos[s2], pos[s1])
+
+    def current():
+        index = pos[first]
+        return tour[index:] + tour[:index]
+
+    queue = deque(tour)
+    queued = [True] * count
+    steps = 0
+    reported = time.perf_counter()
+    pending = False  # есть улучшения, ещё не отданные наружу
+    yield current(), 0
+    while queue:
+        steps += 1
+        if steps % 256 == 0:
+            if stop is not None and stop():
+                break
+            if pending and time.perf_counter() - reported >= report_every:
+                yield current(), steps
+                reported = time.perf_counter()
+                pending = False
+        a = queue.popleft()
+        queued[a] = False
+        changed = improve_two_opt(a) or improve_or_opt(a)
+        if changed:
+            pending = True
+            for point in changed + (a,):
+                if not queued[point]:
+                    queued[point] = True
+                    queue.append(point)
+
+    yield current(), steps
+
+
+def tour_segments(tour: list, coords: np.ndarray):
+    """:return: (длина маршрута, [(индекс точки, длина участка), ...])"""
+    following = tour[1:] + tour[:1]
+    segments = np.hypot(*(coords[following] - coords[tour]).T).tolist()
+    return float(sum(segments)), list(zip(following, segments))
+
+
+def calculate_path_heuristic(
+    coords: np.ndarray,
+    k: int = 8,
+    time_limit: float = None,
+    construction: str = "nearest",
+    stats=None,
+):
+    """
+    Маршрут для сотен и тысяч точек без матрицы расстояний: жадное построение
+    и улучшение 2-opt/Or-opt по спискам k ближайших соседей. Метрика – евклидова.
+    :param coords: массив (n, 2), маршрут начинается в точке 0
+    :param construction: "nearest" – ближайший сосед, "curve" – обход вдоль кривой Гильберта
+    :param stats: SearchStats для времени по фазам и числа шагов локального поиска
+    :return: (длина маршрута, [(индекс точки, длина участка), ...])
+    """
+    with phase(stats, "neighbours"):
+        neighbours = neighbour_lists(coords, k)
+    with phase(stats, "construction"):
+        if construction == "curve":
+            tour = space_filling_tour(coords).tolist()
+        else:
+            tour = nearest_neighbour_tour_large(coords, neighbours)
+    with phase(stats, "local_search"):
+        tour = local_search(tour, coords, neighbours, time_limit, stats)
+    return tour_segments(tour, coords)
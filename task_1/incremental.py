@@ -0,0 +1,85 @@
+"""
+Маршрут, который поддерживается при добавлении и отмене адресов в течение дня.
+
+Новая точка вставляется в самое дешёвое место маршрута, удалённая точка
+просто вырезается, после чего маршрут чинится ходами 2-opt только рядом
+с изменённым местом. Одно изменение стоит O(n * window), а не полного пересчёта.
+"""
+from math import hypot
+
+from postman_v2 import calculate_path
+
+
+def _dist(point_1: tuple, point_2: tuple) -> float:
+    return hypot(point_2[0] - point_1[0], point_2[1] - point_1[1])
+
+
+class IncrementalRoute:
+    """Замкнутый маршрут почтальона, tour[0] – почтовое отделение."""
+
+    def __init__(self, data: list, window: int = 3) -> None:
+        """
+        :param data: почтовое отделение и адресаты, маршрут считается один раз полностью
+        :param window: сколько позиций по обе стороны от изменения проверяет 2-opt
+        """
+        self.window = window
+        self.tour = [data[0]]
+        if len(data) > 1:
+            self.tour += [point for point, _ in calculate_path(data)[1][:-1]]
+
+    def __len__(self) -> int:
+        return len(self.tour)
+
+    @property
+    def length(self) -> float:
+        tour = self.tour
+        return sum(_dist(tour[index - 1], tour[index]) for index in range(len(tour))) if len(tour) > 1 else 0.0
+
+    def insert(self, point: tuple) -> None:
+        """Добавляет адрес в самое дешёвое место маршрута"""
+        tour = self.tour
+        best, best_index = None, 1
+        for index in range(len(tour)):
+            previous, following = tour[index], tour[(index + 1) % len(tour)]
+            cost = _dist(previous, point) + _dist(point, following) - _dist(previous, following)
+            if best is None or cost < best:
+                best, best_index = cost, index + 1
+        tour.insert(best_index, point)
+        self._repair(best_index)
+
+    def remove(self, point: tuple) -> None:
+        """Убирает адрес из маршрута, почтовое отделение убрать нельзя"""
+        index = self.tour.index(point, 1)
+        del self.tour[index]
+        self._repair(index)
+
+    def _repair(self, index: int) -> None:
+        """2-opt, в котором хотя бы одно из меняемых рёбер лежит рядом с позицией index"""
+        tour = self.tour
+        count = len(tour)
+        if count < 4:
+            return
+        improved = True
+        while improved:
+            improved = False
+            for i in range(max(1, index - self.window), min(count, index + self.window + 1)):
+                for j in range(1, count):
+                    low, high = min(i, j), max(i, j)
+                    if high - low < 1:
+                        continue
+                    a, b = tour[low - 1], tour[low]
+                    c, d = tour[high], tour[(high + 1) % count]
+                    if _dist(a, c) + _dist(b, d) - _dist(a, b) - _dist(c, d) < -1e-10:
+                        tour[low : high + 1] = tour[low : high + 1][::-1]
+                        improved = True
+
+    def result(self):
+        """Маршрут в формате calculate_path: (длина, [(точка, длина участка), ...])"""
+        tour = self.tour
+        result = [(point, _dist(tour[index - 1], point)) for index, point in enumerate(tour[1:] + tour[:1], start=1)]
+        return sum(path_size for _, path_size in result), result
+
+    def gap_to_full_solve(self) -> float:
+        """Насколько маршрут длиннее пересчитанного с нуля (0.05 – на 5%)"""
+        optimal = calculate_path(self.tour)[0]
+        return self.length / optimal - 1 if optimal > 0 else 0.0
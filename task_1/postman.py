@@ -1,3 +1,5 @@
+from distance import distance_matrix
+
 point_1 = (0, 2)  # Почтовое отделение – (0, 2)
 point_2 = (2, 5)  # Ул. Грибоедова, 104/25 – (2, 5)
 point_3 = (5, 2)  # Ул. Бейкер стрит, 221б – (5, 2)
@@ -14,28 +16,21 @@ points = [(0, 2), (2, 5), (6, 6), (8, 3), (5, 2)]
 start_point = min(points)
 
 
-def calculate_points(first_point: tuple, second_point: tuple) -> float:
-    """Функция для вычисления расстояния между точками"""
-    return (
-        (second_point[0] - first_point[0]) ** 2
-        + (second_point[1] - first_point[1]) ** 2
-    ) ** 0.5
-
-
 def finding_short_path():
     """Функция перебирает все точки и выводит путь"""
+    # расстояния считаются один раз, дальше берутся по индексам точек
+    distances = distance_matrix(points)
+    start_index = points.index(start_point)
     calculated_points = 0
     last_point = 0
     print(start_point, end=" -> ")
     for current_point in range(len(points) - 1):
         last_point = current_point
         next_point = current_point + 1
-        current_path = calculate_points(points[current_point], points[next_point])
+        current_path = float(distances[current_point, next_point])
         calculated_points += current_path
         print(f"{points[next_point]}[{calculated_points}]", end=" -> ")
-    finish_point = calculated_points + calculate_points(
-        points[last_point + 1], start_point
-    )
+    finish_point = calculated_points + float(distances[last_point + 1, start_index])
     print(f"{start_point}, [{finish_point}] = {finish_point}")
 
 
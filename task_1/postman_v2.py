@@ -1,3 +1,27 @@
+import time
+from math import factorial, inf
+
+import numpy as np
+
+from branch_and_bound import calculate_path_branch_and_bound
+from distance import distance_matrix
+from heuristics import (
+    calculate_path_heuristic,
+    iterate_local_search,
+    nearest_neighbour_tour_large,
+    neighbour_lists,
+    tour_segments,
+)
+from stats import phase
+
+# Больше этого числа перестановок полный перебор не запускаем, считаем динамикой
+PERMUTATIONS_LIMIT = factorial(8)
+# Больше этого числа адресатов динамике не хватает памяти, используем ветви и границы
+HELD_KARP_LIMIT = 16
+# Больше этого числа адресатов точный ответ не ищем, строим маршрут эвристикой
+EXACT_LIMIT = 40
+
+
 def get_path_with_two_points(point_1: tuple, point_2: tuple) -> float:
     return ((point_2[0] - point_1[0]) ** 2 + (point_2[1] - point_1[1]) ** 2) ** 0.5
 
@@ -8,9 +32,14 @@ def calculate_path_rec(
     data: list,
     result: list,
     result_path_size: float,
+    get_distance=get_path_with_two_points,
+    stats=None,
 ):
+    if stats is not None:
+        stats.nodes += 1
+        stats.distance_evaluations += len(data) or 1
     if len(data) == 0:
-        path_size = get_path_with_two_points(
+        path_size = get_distance(
             last_point,
             first_point,
         )
@@ -20,7 +49,7 @@ def calculate_path_rec(
     else:
         point_path_data = []
         for index, point in enumerate(data):
-            path_size = get_path_with_two_points(
+            path_size = get_distance(
                 last_point,
                 point,
             )
@@ -31,22 +60,286 @@ def calculate_path_rec(
                     data[:index] + data[index + 1 :],
                     result + [(point, path_size)],
                     result_path_size + path_size,
+                    get_distance,
+                    stats,
                 )
             )
 
         return min(point_path_data, key=lambda t: t[0])
 
 
-def calculate_and_print_path(data: list):
-    result = calculate_path_rec(
-        data[0],
-        data[0],
-        data[1:],
-        [],
-        0,
+def _stop_check(deadline: float = None, cancel=None):
+    """
+    Функция, сообщающая, что поиск пора остановить.
+    :param deadline: момент остановки по часам time.monotonic()
+    :param cancel: threading.Event или любой объект с методом is_set()
+    """
+    if deadline is None and cancel is None:
+        return None
+    return lambda: (deadline is not None and time.monotonic() >= deadline) or (
+        cancel is not None and cancel.is_set()
     )
 
-    print(f"{data[0]}", end="")
+
+def iterate_path_exhaustive(distances: np.ndarray, deadline: float = None, cancel=None, stats=None):
+    """
+    Полный перебор без рекурсии и без создания списков на каждом шаге.
+    Перестановки строятся обменами на месте, хранится только лучший маршрут,
+    ветка отбрасывается, как только её начало длиннее лучшего маршрута.
+    Зеркальные маршруты не перебираются: точка 1 всегда идёт раньше точки 2,
+    а обратный обход считается отдельно в каждом листе.
+    Каждый новый лучший маршрут сразу отдаётся наружу, последний совпадает
+    с calculate_path_rec, включая выбор среди равных маршрутов.
+    :param distances: матрица расстояний (n, n), маршрут начинается в точке 0
+    :param deadline: момент остановки по часам time.monotonic()
+    :param cancel: threading.Event, при установке которого перебор прекращается
+    :param stats: SearchStats, заполняется по окончании перебора
+    :return: генератор словарей {"path_size", "result", "elapsed", "nodes"},
+        result – [(индекс точки, длина участка), ...]
+    """
+    start = time.perf_counter()
+    stop = _stop_check(deadline, cancel)
+    rows = distances.tolist()
+    count = len(rows) - 1
+    if count == 0:
+        yield {"path_size": rows[0][0], "result": [(0, rows[0][0])], "elapsed": 0.0, "nodes": 0}
+        return
+
+    perm = list(range(1, count + 1))
+    sizes = [0.0] * (count + 1)  # sizes[d] – длина пути через perm[:d]
+    candidate = [0] * count  # candidate[d] – следующий индекс для обмена на глубине d
+    first_placed = False  # стоит ли точка 1 в уже построенной части маршрута
+    best, best_perm = inf, None
+    bound = inf
+    depth = 0
+    nodes = 0
+    pruned = 0
+    leaves = 0
+
+    try:
+        while depth >= 0:
+            i = candidate[depth]
+            if i == count:
+                depth -= 1
+                if depth >= 0:
+                    if perm[depth] == 1:
+                        first_placed = False
+                    j = candidate[depth] - 1
+                    perm[depth], perm[j] = perm[j], perm[depth]
+                continue
+            candidate[depth] = i + 1
+
+            point = perm[i]
+            if point == 2 and not first_placed:
+                continue
+            size = sizes[depth] + rows[perm[depth - 1] if depth else 0][point]
+            if size > bound:
+                pruned += 1
+                continue
+            nodes += 1
+            if stop is not None and nodes & 4095 == 0 and stop():
+                return
+
+            if depth + 1 < count:
+                perm[depth], perm[i] = point, perm[depth]
+                if point == 1:
+                    first_placed = True
+                sizes[depth + 1] = size
+                depth += 1
+                candidate[depth] = depth
+                continue
+
+            # лист: маршрут perm[:depth] + [point] и его зеркальное отражение
+            leaves += 1
+            route = perm[:depth] + [point]
+            forward = size + rows[point][0]
+            backward = 0
+            previous = 0
+            for current in reversed(route):
+                backward += rows[previous][current]
+                previous = current
+            backward += rows[previous][0]
+            improved = False
+            for path_size, path in ((forward, route), (backward, route[::-1])):
+                if path_size < best or (path_size == best and path < best_perm):
+                    best, best_perm = path_size, path
+                    improved = True
+            if not improved:
+                continue
+            # запас на погрешность: зеркальный обход суммируется в другом порядке
+            bound = best + abs(best) * 1e-9
+
+            result = []
+            previous = 0
+            for index in best_perm + [0]:
+                result.append((index, rows[previous][index]))
+                previous = index
+            yield {"path_size": best, "result": result, "elapsed": time.perf_counter() - start, "nodes": nodes}
+    finally:
+        if stats is not None:
+            stats.nodes += nodes
+            stats.pruned += pruned
+            # каждая проверенная ветка – одно расстояние, лист – ещё обратный обход
+            stats.distance_evaluations += nodes + pruned + leaves * (count + 1)
+
+
+def calculate_path_exhaustive(distances: np.ndarray, stats=None):
+    """
+    Полный перебор, см. iterate_path_exhaustive.
+    :return: (длина маршрута, [(индекс точки, длина участка), ...])
+    """
+    for improvement in iterate_path_exhaustive(distances, stats=stats):
+        pass
+    return improvement["path_size"], improvement["result"]
+
+
+def calculate_path_held_karp(distances: np.ndarray, stats=None):
+    """
+    Точный поиск кратчайшего маршрута динамикой по подмножествам (Held-Karp), O(n² * 2ⁿ).
+    Маршрут начинается и заканчивается в точке с индексом 0.
+    :param distances: матрица расстояний (n, n)
+    :param stats: SearchStats, nodes – число состояний динамики
+    :return: (длина маршрута, [(индекс точки, длина участка), ...])
+    """
+    count = len(distances) - 1
+    if count == 0:
+        return 0.0, [(0, 0.0)]
+
+    # path_size[mask, j] – кратчайший путь из точки 0 через точки mask с концом в точке j + 1;
+    # для j вне mask значение остаётся inf, поэтому при переходе маскировать ничего не нужно
+    inner = distances[1:, 1:]
+    full_mask = (1 << count) - 1
+    path_size = np.full((full_mask + 1, count), np.inf, dtype=distances.dtype)
+    parent = np.full((full_mask + 1, count), -1, dtype=np.int8)
+    for j in range(count):
+        path_size[1 << j, j] = distances[0, j + 1]
+
+    # маски обрабатываем слоями по числу точек, внутри слоя – сразу массивом
+    masks = np.arange(full_mask + 1)
+    bits = np.zeros(full_mask + 1, dtype=np.int8)
+    for j in range(count):
+        bits += (masks >> j) & 1
+    for size in range(2, count + 1):
+        layer = masks[bits == size]
+        for j in range(count):
+            bit = 1 << j
+            current = layer[(layer & bit) != 0]
+            candidates = path_size[current ^ bit] + inner[:, j]
+            if stats is not None:
+                stats.nodes += len(current)
+                stats.distance_evaluations += candidates.size
+            best = candidates.argmin(axis=1)
+            path_size[current, j] = candidates[np.arange(len(current)), best]
+            parent[current, j] = best
+
+    closing = path_size[full_mask] + distances[1:, 0]
+    last = int(closing.argmin())
+
+    # восстанавливаем порядок обхода с конца
+    order = []
+    mask = full_mask
+    while last != -1:
+        order.append(last + 1)
+        mask, last = mask ^ (1 << last), int(parent[mask, last])
+    order.reverse()
+
+    result = []
+    previous = 0
+    for index in order + [0]:
+        result.append((index, float(distances[previous, index])))
+        previous = index
+    return float(closing.min()), result
+
+
+def calculate_path(
+    data: list,
+    metric: str = "euclidean",
+    time_limit: float = None,
+    mode: str = "auto",
+    stats=None,
+):
+    """
+    Ищет кратчайший маршрут по матрице расстояний, построенной один раз.
+    Выбирает перебор, Held-Karp или ветви и границы в зависимости от числа точек.
+    :param time_limit: ограничение по времени для ветвей и границ и для эвристики
+    :param mode: "exact", "heuristic" или "auto" – эвристика для евклидовой метрики
+        при числе адресатов больше EXACT_LIMIT
+    :param stats: SearchStats для счётчиков и времени по фазам, без него статистика не ведётся
+    :return: (длина маршрута, [(точка, длина участка), ...])
+    """
+    if mode == "auto":
+        mode = "heuristic" if metric == "euclidean" and len(data) - 1 > EXACT_LIMIT else "exact"
+    if mode == "heuristic":
+        if metric != "euclidean":
+            raise ValueError("Heuristic mode supports only euclidean metric")
+        result = calculate_path_heuristic(np.asarray(data, dtype=np.float64), time_limit=time_limit, stats=stats)
+        return result[0], [(data[index], path_size) for index, path_size in result[1]]
+
+    with phase(stats, "distance_matrix"):
+        distances = distance_matrix(data, metric)
+    result = calculate_path_matrix(distances, time_limit, stats)
+    return result[0], [(data[index], path_size) for index, path_size in result[1]]
+
+
+def calculate_path_matrix(distances: np.ndarray, time_limit: float = None, stats=None):
+    """
+    Точный решатель по готовой симметричной матрице расстояний, маршрут из точки 0.
+    :return: (длина маршрута, [(индекс точки, длина участка), ...])
+    """
+    count = len(distances) - 1
+    with phase(stats, "search"):
+        if count > HELD_KARP_LIMIT:
+            result = calculate_path_branch_and_bound(distances, time_limit, stats=stats)
+        elif factorial(count) > PERMUTATIONS_LIMIT:
+            result = calculate_path_held_karp(distances, stats)
+        else:
+            result = calculate_path_exhaustive(distances, stats)
+    return result[0], result[1]
+
+
+def iterate_path(data: list, metric: str = "euclidean", mode: str = "auto", deadline: float = None, cancel=None):
+    """
+    Поиск маршрута, отдающий каждый новый лучший маршрут сразу, как он найден.
+    Вызывающий код может в любой момент взять последний результат и прекратить итерацию.
+    :param mode: "exhaustive" – полный перебор, "heuristic" – эвристика для евклидовой метрики,
+        "auto" – перебор, пока число перестановок не больше PERMUTATIONS_LIMIT
+    :param deadline: момент остановки по часам time.monotonic()
+    :param cancel: threading.Event для остановки поиска из другого потока
+    :return: генератор словарей {"path_size", "result", "elapsed", "nodes"},
+        result – [(точка, длина участка), ...]
+    """
+    if mode == "auto":
+        small = factorial(len(data) - 1) <= PERMUTATIONS_LIMIT
+        mode = "exhaustive" if small or metric != "euclidean" else "heuristic"
+
+    if mode == "exhaustive":
+        for improvement in iterate_path_exhaustive(distance_matrix(data, metric), deadline, cancel):
+            improvement["result"] = [(data[index], path_size) for index, path_size in improvement["result"]]
+            yield improvement
+        return
+
+    if metric != "euclidean":
+        raise ValueError("Heuristic mode supports only euclidean metric")
+    start = time.perf_counter()
+    coords = np.asarray(data, dtype=np.float64)
+    neighbours = neighbour_lists(coords)
+    tour = nearest_neighbour_tour_large(coords, neighbours)
+    best = inf
+    stop = _stop_check(deadline, cancel)
+    for tour, nodes in iterate_local_search(tour, coords, neighbours, stop):
+        path_size, result = tour_segments(tour, coords)
+        if path_size < best:
+            best = path_size
+            yield {
+                "path_size": path_size,
+                "result": [(data[index], size) for index, size in result],
+                "elapsed": time.perf_counter() - start,
+                "nodes": nodes,
+            }
+
+
+def print_path(first_point: tuple, result):
+    print(f"{first_point}", end="")
     path_full_size = 0
     for point, path_size in result[1]:
         path_full_size += path_size
@@ -55,6 +348,10 @@ def calculate_and_print_path(data: list):
     print(f" = {result[0]}")
 
 
+def calculate_and_print_path(data: list, metric: str = "euclidean", mode: str = "auto"):
+    print_path(data[0], calculate_path(data, metric, mode=mode))
+
+
 def main():
     data = [(0, 2), (2, 5), (5, 2), (6, 6), (8, 3)]
     calculate_and_print_path(data)
@@ -0,0 +1,132 @@
+"""
+Расстояния по дорогам вместо расстояний по прямой.
+
+Граф дорог читается из текстового файла рёбер, по строке на отрезок дороги:
+    x1 y1 x2 y2 [длина]
+Узлы определяются координатами концов, длина по умолчанию – длина отрезка.
+Дороги двусторонние. Адресаты привязываются к ближайшим узлам, матрица
+кратчайших путей считается алгоритмом Дейкстры из каждого адресата
+параллельно и сохраняется на диск с ключом по хэшу графа и набору узлов.
+"""
+import hashlib
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from math import hypot, inf
+
+import numpy as np
+
+from postman_v2 import calculate_path_matrix
+
+_graph = None  # (indptr, indices, weights) в процессе-работнике
+
+
+class RoadGraph:
+    """Неориентированный граф дорог в сжатом виде (CSR)."""
+
+    def __init__(self, coords: np.ndarray, edges: np.ndarray, weights: np.ndarray) -> None:
+        """
+        :param coords: координаты узлов (n, 2)
+        :param edges: пары номеров узлов (m, 2)
+        :param weights: длины рёбер (m,)
+        """
+        self.coords = coords
+        both = np.concatenate([edges, edges[:, ::-1]])
+        both_weights = np.concatenate([weights, weights])
+        order = np.argsort(both[:, 0], kind="stable")
+        self.indices = both[order, 1]
+        self.weights = both_weights[order]
+        self.indptr = np.searchsorted(both[order, 0], np.arange(len(coords) + 1))
+        digest = hashlib.sha256()
+        for array in (coords, edges, weights):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        self.hash = digest.hexdigest()
+
+    @classmethod
+    def from_file(cls, path: str) -> "RoadGraph":
+        nodes = {}
+        edges = []
+        weights = []
+        with open(path) as file:
+            for line in file:
+                line = line.split("#")[0].split()
+                if not line:
+                    continue
+                x1, y1, x2, y2 = map(float, line[:4])
+                ends = [nodes.setdefault(point, len(nodes)) for point in ((x1, y1), (x2, y2))]
+                edges.append(ends)
+                weights.append(float(line[4]) if len(line) > 4 else hypot(x2 - x1, y2 - y1))
+        coords = np.array(list(nodes), dtype=np.float64).reshape(-1, 2)
+        return cls(coords, np.array(edges, dtype=np.int64).reshape(-1, 2), np.array(weights, dtype=np.float64))
+
+    def snap(self, points: list) -> list:
+        """Номер ближайшего узла для каждой точки"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return [int(((self.coords - point) ** 2).sum(axis=1).argmin()) for point in points]
+
+    def shortest_paths(self, sources: list, workers: int = None, cache_dir: str = None) -> np.ndarray:
+        """
+        Матрица кратчайших путей между узлами sources.
+        :param workers: число процессов для запусков Дейкстры
+        :param cache_dir: каталог для сохранения матриц между запусками
+        """
+        cache_path = None
+        if cache_dir is not None:
+            nodes_hash = hashlib.sha256(np.array(sources, dtype=np.int64).tobytes()).hexdigest()[:16]
+            cache_path = os.path.join(cache_dir, f"{self.hash[:32]}-{nodes_hash}.npy")
+            if os.path.exists(cache_path):
+                return np.load(cache_path)
+
+        graph = (self.indptr.tolist(), self.indices.tolist(), self.weights.tolist())
+        tasks = [(source, sources) for source in sources]
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(graph,)) as pool:
+            rows = list(pool.map(_dijkstra, tasks, chunksize=max(1, len(tasks) // 32)))
+        matrix = np.array(rows, dtype=np.float64).reshape(len(sources), len(sources))
+        # суммы по одному пути в разных направлениях могут разойтись в последнем знаке
+        matrix = np.minimum(matrix, matrix.T)
+
+        if cache_path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(cache_path, matrix)
+        return matrix
+
+
+def _init_worker(graph: tuple):
+    global _graph
+    _graph = graph
+
+
+def _dijkstra(task: tuple) -> list:
+    """Дейкстра из одного узла, останавливается, когда найдены все нужные узлы"""
+    source, targets = task
+    indptr, indices, weights = _graph
+    distances = {source: 0.0}
+    left = set(targets)
+    done = set()
+    heap = [(0.0, source)]
+    while heap and left:
+        distance, node = heapq.heappop(heap)
+        if node in done:
+            continue
+        done.add(node)
+        left.discard(node)
+        for edge in range(indptr[node], indptr[node + 1]):
+            neighbour = indices[edge]
+            candidate = distance + weights[edge]
+            if candidate < distances.get(neighbour, inf):
+                distances[neighbour] = candidate
+                heapq.heappush(heap, (candidate, neighbour))
+    return [distances[target] if target in done else inf for target in targets]
+
+
+def calculate_path_on_roads(data: list, graph: RoadGraph, workers: int = None, cache_dir: str = None):
+    """
+    Кратчайший маршрут по дорогам, адресаты привязываются к ближайшим узлам графа.
+    :return: (длина маршрута, [(точка, длина участка), ...])
+    """
+    nodes = graph.snap(data)
+    distances = graph.shortest_paths(nodes, workers, cache_dir)
+    if np.isinf(distances).any():
+        raise ValueError("Some addresses are not reachable by roads")
+    result = calculate_path_matrix(distances)
+    return result[0], [(data[index], path_size) for index, path_size in result[1]]
@@ -0,0 +1,29 @@
+"""
+Общие функции для маршрутов, заданных списком индексов точек.
+
+Маршрут (tour) – список индексов, начинающийся с почтового отделения 0,
+без повторения нуля в конце.
+"""
+import numpy as np
+
+
+def tour_length(tour: list, distances: np.ndarray) -> float:
+    """Длина замкнутого маршрута"""
+    path_size = 0.0
+    for index in range(len(tour)):
+        path_size += distances[tour[index - 1], tour[index]]
+    return float(path_size)
+
+
+def tour_to_result(tour: list, distances: np.ndarray):
+    """
+    Переводит маршрут в формат решателей postman_v2.
+    :return: (длина маршрута, [(индекс точки, длина участка), ...])
+    """
+    result = []
+    path_size = 0.0
+    for previous, index in zip(tour, tour[1:] + tour[:1]):
+        size = float(distances[previous, index])
+        result.append((index, size))
+        path_size += size
+    return path_size, result
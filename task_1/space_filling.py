@@ -0,0 +1,96 @@
+"""
+Огромные наборы точек: бинарный файл координат и обход по кривой, заполняющей плоскость.
+
+Файл координат – подряд идущие пары float64 x, y без заголовка. Он открывается
+через np.memmap и не превращается в кортежи Python. Порядок точек вдоль кривой
+Гильберта или Мортона (Z-кривой) даёт начальный маршрут за O(n log n)
+и режет точки на пространственно компактные куски для других решателей.
+"""
+import numpy as np
+
+ORDER = 16  # бит на координату: сетка 65536 x 65536
+BLOCK = 1 << 20  # сколько точек обрабатывать за раз, чтобы не раздувать временные массивы
+
+
+def write_coordinates(path: str, points) -> None:
+    """Записывает точки (x, y) в бинарный файл float64"""
+    np.asarray(points, dtype=np.float64).reshape(-1, 2).tofile(path)
+
+
+def open_coordinates(path: str) -> np.ndarray:
+    """Открывает файл координат без чтения в память, форма (n, 2)"""
+    return np.memmap(path, dtype=np.float64, mode="r").reshape(-1, 2)
+
+
+def _grid(coords: np.ndarray, low: np.ndarray, scale: float) -> tuple:
+    cells = ((coords - low) * scale).astype(np.int64)
+    np.clip(cells, 0, (1 << ORDER) - 1, out=cells)
+    return cells[:, 0], cells[:, 1]
+
+
+def hilbert_keys(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Номер клетки (x, y) вдоль кривой Гильберта"""
+    side = 1 << ORDER
+    keys = np.zeros(len(x), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        keys += s * s * ((3 * rx) ^ ry)
+        # поворот четверти, чтобы следующий уровень шёл в той же системе
+        flip = ~ry & rx
+        flipped_x = np.where(flip, side - 1 - x, x)
+        flipped_y = np.where(flip, side - 1 - y, y)
+        x = np.where(ry, flipped_x, flipped_y)
+        y = np.where(ry, flipped_y, flipped_x)
+        s >>= 1
+    return keys
+
+
+def _spread_bits(value: np.ndarray) -> np.ndarray:
+    value = value.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                        (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        value = (value | (value << np.uint64(shift))) & np.uint64(mask)
+    return value
+
+
+def morton_keys(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Номер клетки (x, y) вдоль Z-кривой: биты x и y через один"""
+    return (_spread_bits(x) | (_spread_bits(y) << np.uint64(1))).astype(np.int64)
+
+
+CURVES = {
+    "hilbert": hilbert_keys,
+    "morton": morton_keys,
+}
+
+
+def curve_keys(coords: np.ndarray, curve: str = "hilbert") -> np.ndarray:
+    """Ключи всех точек вдоль кривой, считаются кусками по BLOCK точек"""
+    if curve not in CURVES:
+        raise ValueError(f"Unknown curve: {curve}")
+    low = coords.min(axis=0)
+    span = float((coords.max(axis=0) - low).max()) or 1.0
+    scale = ((1 << ORDER) - 1) / span
+    keys = np.empty(len(coords), dtype=np.int64)
+    for begin in range(0, len(coords), BLOCK):
+        block = np.asarray(coords[begin : begin + BLOCK])
+        keys[begin : begin + BLOCK] = CURVES[curve](*_grid(block, low, scale))
+    return keys
+
+
+def space_filling_tour(coords: np.ndarray, curve: str = "hilbert") -> np.ndarray:
+    """
+    Маршрут вдоль кривой за O(n log n), начинается с точки 0.
+    :return: массив индексов точек
+    """
+    tour = np.argsort(curve_keys(coords, curve), kind="stable")
+    start = int(np.flatnonzero(tour == 0)[0])
+    return np.roll(tour, -start)
+
+
+def curve_chunks(coords: np.ndarray, chunk_size: int, curve: str = "hilbert") -> list:
+    """Делит точки на куски по chunk_size соседних вдоль кривой, возвращает массивы индексов"""
+    order = np.argsort(curve_keys(coords, curve), kind="stable")
+    return [order[begin : begin + chunk_size] for begin in range(0, len(order), chunk_size)]
@@ -0,0 +1,45 @@
+"""
+Счётчики и замеры времени для решателей маршрута.
+
+Решатели принимают необязательный параметр stats. Если он не передан,
+счётчики не ведутся и замеры не делаются.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class SearchStats:
+    """Статистика одного поиска маршрута."""
+
+    def __init__(self, callback=None) -> None:
+        """
+        :param callback: функция callback(phase, stats), вызывается по окончании каждой фазы
+        """
+        self.nodes = 0  # раскрытые вершины дерева поиска или шаги локального поиска
+        self.distance_evaluations = 0  # обращения к расстояниям между точками
+        self.pruned = 0  # отброшенные ветки
+        self.phases = {}  # время по фазам, секунды
+        self.callback = callback
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+            if self.callback is not None:
+                self.callback(name, self)
+
+    def as_dict(self) -> dict:
+        return {
+            "nodes": self.nodes,
+            "distance_evaluations": self.distance_evaluations,
+            "pruned": self.pruned,
+            "phases": dict(self.phases),
+        }
+
+
+def phase(stats, name: str):
+    """Замер фазы, если статистика включена, иначе пустой контекст"""
+    return nullcontext() if stats is None else stats.phase(name)
@@ -0,0 +1,402 @@
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from annealing import calculate_path_annealing
+from approximation import calculate_path_approximation
+from batch import LatencyStats, read_csv, read_jsonl, solve_stream
+from benchmark import run as run_benchmark
+from branch_and_bound import calculate_path_branch_and_bound
+from cache import RouteCache, instance_key
+from couriers import calculate_routes, split_kmeans, split_sweep
+from distance import distance_matrix
+from heuristics import calculate_path_heuristic, nearest_neighbour_tour_large, neighbour_lists, tour_segments
+from incremental import IncrementalRoute
+from postman_v2 import (
+    calculate_path,
+    calculate_path_exhaustive,
+    calculate_path_held_karp,
+    calculate_path_rec,
+    get_path_with_two_points,
+    iterate_path,
+)
+from road_network import RoadGraph, calculate_path_on_roads
+from space_filling import curve_chunks, open_coordinates, space_filling_tour, write_coordinates
+from stats import SearchStats
+
+DATA = [(0, 2), (2, 5), (5, 2), (6, 6), (8, 3)]
+
+
+def random_points(count: int, seed: int) -> list:
+    rnd = random.Random(seed)
+    return [(rnd.randint(0, 100), rnd.randint(0, 100)) for _ in range(count)]
+
+
+class TestDistanceMatrix(unittest.TestCase):
+    def test_euclidean(self):
+        distances = distance_matrix(DATA)
+        self.assertTrue(distances.flags["C_CONTIGUOUS"])
+        self.assertAlmostEqual(distances[0, 1], get_path_with_two_points(DATA[0], DATA[1]))
+        self.assertTrue(np.allclose(distances, distances.T))
+
+    def test_manhattan(self):
+        distances = distance_matrix(DATA, "manhattan", np.float32)
+        self.assertEqual(distances.dtype, np.float32)
+        self.assertEqual(distances[0, 1], 5)
+
+    def test_haversine(self):
+        # Москва – Санкт-Петербург, около 634 км
+        distances = distance_matrix([(55.7558, 37.6173), (59.9343, 30.3351)], "haversine")
+        self.assertAlmostEqual(distances[0, 1], 634, delta=2)
+
+    def test_unknown_metric(self):
+        with self.assertRaises(ValueError):
+            distance_matrix(DATA, "chebyshev")
+
+
+class TestHeldKarp(unittest.TestCase):
+    def test_same_length_as_brute_force(self):
+        for seed in range(5):
+            data = random_points(7, seed)
+            expected = calculate_path_rec(data[0], data[0], data[1:], [], 0)
+            result = calculate_path_held_karp(distance_matrix(data))
+            self.assertAlmostEqual(result[0], expected[0])
+
+    def test_result_format(self):
+        result = calculate_path_held_karp(distance_matrix(DATA))
+        self.assertEqual(result[1][-1][0], 0)
+        self.assertEqual(sorted(index for index, _ in result[1][:-1]), [1, 2, 3, 4])
+        self.assertAlmostEqual(sum(size for _, size in result[1]), result[0])
+
+
+class TestExhaustive(unittest.TestCase):
+    def test_same_route_as_recursive(self):
+        # маленькая сетка даёт много маршрутов одинаковой длины
+        for seed in range(30):
+            rnd = random.Random(seed)
+            data = [(rnd.randint(0, 4), rnd.randint(0, 4)) for _ in range(rnd.randint(1, 7))]
+            distances = distance_matrix(data)
+            rows = distances.tolist()
+            expected = calculate_path_rec(0, 0, list(range(1, len(data))), [], 0, lambda i, j: rows[i][j])
+            self.assertEqual(calculate_path_exhaustive(distances), expected)
+
+
+class TestBranchAndBound(unittest.TestCase):
+    def test_same_length_as_held_karp(self):
+        for seed in range(10):
+            distances = distance_matrix(random_points(11, seed))
+            path_size, result, stats = calculate_path_branch_and_bound(distances)
+            self.assertAlmostEqual(path_size, calculate_path_held_karp(distances)[0])
+            self.assertTrue(stats["optimal"])
+            self.assertEqual(stats["gap"], 0.0)
+
+    def test_time_limit_returns_tour(self):
+        distances = distance_matrix(random_points(30, 1))
+        path_size, result, stats = calculate_path_branch_and_bound(distances, time_limit=0)
+        self.assertEqual(sorted(index for index, _ in result), list(range(30)))
+        self.assertGreaterEqual(path_size, stats["lower_bound"])
+
+    def test_progress(self):
+        reports = []
+        calculate_path_branch_and_bound(distance_matrix(random_points(12, 2)), progress=reports.append, report_every=1)
+        self.assertTrue(reports[-1]["optimal"])
+        self.assertEqual([report["nodes"] for report in reports[:-1]], list(range(1, len(reports))))
+
+
+class TestHeuristic(unittest.TestCase):
+    def test_neighbour_lists_are_exact(self):
+        coords = np.random.default_rng(0).random((300, 2))
+        distances = distance_matrix(coords)
+        np.fill_diagonal(distances, np.inf)
+        expected = np.argsort(distances, axis=1)[:, :5].tolist()
+        self.assertEqual(neighbour_lists(coords, 5), expected)
+
+    def test_tour_visits_every_point(self):
+        coords = np.random.default_rng(1).random((1000, 2))
+        path_size, result = calculate_path_heuristic(coords)
+        self.assertEqual(sorted(index for index, _ in result), list(range(1000)))
+        self.assertEqual(result[-1][0], 0)
+        self.assertAlmostEqual(sum(size for _, size in result), path_size)
+
+    def test_close_to_optimal(self):
+        data = random_points(12, 3)
+        path_size, _ = calculate_path_heuristic(np.asarray(data, dtype=np.float64))
+        self.assertLess(path_size, calculate_path(data)[0] * 1.1)
+
+    def test_ten_thousand_points(self):
+        # время на 10 000 точек меряет benchmark.py, здесь только результат
+        coords = np.random.default_rng(2).random((10000, 2)) * 1000
+        path_size, result = calculate_path_heuristic(coords)
+        self.assertEqual(sorted(index for index, _ in result), list(range(10000)))
+        greedy = nearest_neighbour_tour_large(coords, neighbour_lists(coords))
+        self.assertLessEqual(path_size, tour_segments(greedy, coords)[0])
+
+
+class TestAnnealing(unittest.TestCase):
+    def test_same_result_for_any_worker_count(self):
+        coords = np.random.default_rng(2).random((60, 2))
+        kwargs = {"islands": 2, "epochs": 2, "moves": 2000, "seed": 7}
+        first = calculate_path_annealing(coords, workers=1, **kwargs)
+        self.assertEqual(calculate_path_annealing(coords, workers=2, **kwargs), first)
+        self.assertEqual(sorted(index for index, _ in first[1]), list(range(60)))
+
+    def test_degenerate_input(self):
+        for coords in ([[0.0, 0.0]], [[1.0, 1.0]] * 10):
+            path_size, path = calculate_path_annealing(np.array(coords), islands=2, epochs=2, moves=100)
+            self.assertEqual(path_size, 0)
+            self.assertEqual(len(path), len(coords))
+
+    def test_time_limit_inside_epoch(self):
+        coords = np.random.default_rng(3).random((200, 2))
+        start = time.perf_counter()
+        calculate_path_annealing(coords, islands=1, workers=1, epochs=1, moves=10**8, time_limit=0.5)
+        self.assertLess(time.perf_counter() - start, 5)
+
+
+class TestBatch(unittest.TestCase):
+    def test_readers(self):
+        lines = ["id,x,y", "a,0,2", "a,2,5", "b,1,1", "b,3,3", "b,5,1"]
+        self.assertEqual([instance_id for instance_id, _ in read_csv(lines)], ["a", "b"])
+        self.assertEqual(list(read_jsonl(['{"id": 3, "points": [[0, 2], [2, 5]]}'])), [(3, [(0, 2), (2, 5)])])
+
+    def test_results_keep_input_order(self):
+        instances = [(number, random_points(5, number)) for number in range(20)]
+        stats = LatencyStats()
+        results = list(solve_stream(iter(instances), workers=2, chunk_size=3, max_pending=2, stats=stats))
+        self.assertEqual([result["id"] for result in results], list(range(20)))
+        self.assertAlmostEqual(results[4]["path_size"], calculate_path(instances[4][1])[0])
+        self.assertEqual(stats.report()["instances"], 20)
+
+
+class TestCouriers(unittest.TestCase):
+    def test_splits_cover_all_addresses(self):
+        data = random_points(23, 4)
+        for split in (split_sweep, split_kmeans):
+            groups = split(data, 3)
+            self.assertEqual(len(groups), 3)
+            self.assertEqual(sorted(point for group in groups for point in group), sorted(data[1:]))
+            self.assertLessEqual(max(len(group) for group in groups), 8)
+
+    def test_groups_are_balanced(self):
+        # при нарезке по ceil(m / k) здесь оставались пустые группы
+        for seed in (40, 1499, 1597):
+            data = random_points(9, seed)
+            for split in (split_sweep, split_kmeans):
+                for couriers in (3, 4, 5, 8):
+                    sizes = sorted(len(group) for group in split(data, couriers))
+                    self.assertEqual(sum(sizes), 8)
+                    self.assertGreater(sizes[0], 0)
+                    self.assertLessEqual(sizes[-1] - sizes[0], 1)
+        self.assertEqual([len(group) for group in split_sweep(random_points(6, 0), 4)], [2, 1, 1, 1])
+
+    def test_routes(self):
+        data = random_points(13, 5)
+        routes, makespan, total = calculate_routes(data, 2, workers=2)
+        self.assertEqual(len(routes), 2)
+        self.assertAlmostEqual(total, sum(path_size for path_size, _ in routes))
+        self.assertEqual(makespan, max(path_size for path_size, _ in routes))
+        # два почтальона проезжают не меньше одного
+        self.assertGreaterEqual(total, calculate_path(data)[0] - 1e-9)
+
+
+class TestIncrementalRoute(unittest.TestCase):
+    def test_insert_and_remove_close_to_full_solve(self):
+        data = random_points(14, 6)
+        route = IncrementalRoute(data[:7])
+        for point in data[7:]:
+            route.insert(point)
+            self.assertLess(route.gap_to_full_solve(), 0.1)
+        for point in data[1:7]:
+            route.remove(point)
+            self.assertLess(route.gap_to_full_solve(), 0.1)
+        self.assertEqual(sorted(route.tour), sorted(data[:1] + data[7:]))
+        self.assertAlmostEqual(route.result()[0], route.length)
+
+    def test_office_cannot_be_removed(self):
+        route = IncrementalRoute(DATA)
+        with self.assertRaises(ValueError):
+            route.remove(DATA[0])
+
+
+class TestRouteCache(unittest.TestCase):
+    def test_key_ignores_order_of_addresses(self):
+        self.assertEqual(instance_key(DATA), instance_key(DATA[:1] + DATA[:0:-1]))
+        self.assertNotEqual(instance_key(DATA), instance_key(DATA[1:] + DATA[:1]))
+        self.assertNotEqual(instance_key(DATA), instance_key(DATA, "manhattan"))
+        self.assertEqual(instance_key([(1, 2), (3, 4)]), instance_key([(1.0, 2.0), (3.0, 4.0)]))
+
+    def test_key_depends_on_solver_options(self):
+        self.assertNotEqual(instance_key(DATA), instance_key(DATA, mode="heuristic"))
+        self.assertNotEqual(instance_key(DATA), instance_key(DATA, time_limit=0.1))
+        cache = RouteCache()
+        cache.calculate_path(DATA, mode="heuristic")
+        self.assertIsNone(cache.get(DATA, mode="exact"))
+        self.assertEqual(cache.calculate_path(DATA, mode="exact"), calculate_path(DATA, mode="exact"))
+        cache.close()
+
+    def test_lru_and_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "routes.sqlite")
+            cache = RouteCache(path, max_size=1)
+            expected = cache.calculate_path(DATA)
+            self.assertEqual(cache.calculate_path(DATA[:1] + DATA[:0:-1]), expected)
+            cache.calculate_path(random_points(5, 1))
+            self.assertEqual(len(cache.memory), 1)
+            self.assertEqual(cache.stats()["misses"], 2)
+            cache.close()
+
+            cache = RouteCache(path)
+            self.assertEqual(cache.calculate_path(DATA), expected)
+            self.assertEqual(cache.stats(), {"hits": 1, "disk_hits": 1, "misses": 0, "size": 1})
+            cache.close()
+
+
+class TestIteratePath(unittest.TestCase):
+    def test_exhaustive_improves_to_optimum(self):
+        data = random_points(8, 7)
+        improvements = list(iterate_path(data))
+        lengths = [improvement["path_size"] for improvement in improvements]
+        self.assertEqual(lengths, sorted(lengths, reverse=True))
+        self.assertEqual(improvements[-1]["result"], calculate_path_rec(data[0], data[0], data[1:], [], 0)[1])
+
+    def test_heuristic_deadline(self):
+        data = random_points(2000, 8)
+        improvements = list(iterate_path(data, mode="heuristic", deadline=time.monotonic()))
+        self.assertEqual(improvements[0]["nodes"], 0)
+        self.assertLessEqual(improvements[-1]["nodes"], 256)
+        self.assertEqual(len(improvements[-1]["result"]), 2000)
+
+    def test_cancel(self):
+        cancel = threading.Event()
+        for improvement in iterate_path(random_points(12, 9), mode="exhaustive", cancel=cancel):
+            cancel.set()
+        self.assertLess(improvement["nodes"], 10**6)
+
+
+class TestSpaceFilling(unittest.TestCase):
+    def test_hilbert_steps_between_neighbours(self):
+        grid = [(x, y) for x in range(4) for y in range(4)]
+        tour = space_filling_tour(np.array(grid, dtype=np.float64))
+        steps = [abs(grid[a][0] - grid[b][0]) + abs(grid[a][1] - grid[b][1]) for a, b in zip(tour, tour[1:])]
+        self.assertEqual(sorted(tour.tolist()), list(range(16)))
+        self.assertEqual(max(steps), 1)
+
+    def test_memmap_file(self):
+        coords = np.random.default_rng(3).random((5000, 2))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "points.bin")
+            write_coordinates(path, coords)
+            mapped = open_coordinates(path)
+            self.assertIsInstance(mapped, np.memmap)
+            self.assertTrue(np.array_equal(mapped, coords))
+            for curve in ("hilbert", "morton"):
+                tour = space_filling_tour(mapped, curve)
+                self.assertEqual(tour[0], 0)
+                self.assertEqual(np.sort(tour).tolist(), list(range(5000)))
+            chunks = curve_chunks(mapped, 1000)
+            self.assertEqual([len(chunk) for chunk in chunks], [1000] * 5)
+            del mapped
+
+    def test_curve_construction(self):
+        coords = np.random.default_rng(4).random((500, 2))
+        path_size, result = calculate_path_heuristic(coords, construction="curve")
+        self.assertEqual(sorted(index for index, _ in result), list(range(500)))
+        self.assertLess(path_size, calculate_path_heuristic(coords)[0] * 1.1)
+
+
+class TestRoadNetwork(unittest.TestCase):
+    def setUp(self):
+        # решётка дорог 5 x 5 с шагом 1: расстояние по дорогам – манхэттенское
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "roads.txt")
+        with open(self.path, "w") as file:
+            file.write("# x1 y1 x2 y2\n")
+            for x in range(5):
+                for y in range(5):
+                    if x < 4:
+                        file.write(f"{x} {y} {x + 1} {y}\n")
+                    if y < 4:
+                        file.write(f"{x} {y} {x} {y + 1}\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_grid_matches_manhattan(self):
+        graph = RoadGraph.from_file(self.path)
+        data = [(0, 2), (2, 4), (4, 1), (3, 3), (1, 0)]
+        path_size, result = calculate_path_on_roads(data, graph, workers=2)
+        self.assertAlmostEqual(path_size, calculate_path(data, "manhattan")[0])
+        self.assertEqual(result[-1][0], data[0])
+
+    def test_matrix_cache(self):
+        graph = RoadGraph.from_file(self.path)
+        cache_dir = os.path.join(self.directory.name, "cache")
+        first = graph.shortest_paths([0, 7, 24], workers=1, cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertTrue(np.array_equal(graph.shortest_paths([0, 7, 24], cache_dir=cache_dir), first))
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_exact_solvers_agree(self):
+        records = run_benchmark([5, 7])
+        self.assertEqual({record["layout"] for record in records}, {"uniform", "clustered"})
+        self.assertTrue(all(record["peak_bytes"] > 0 for record in records))
+
+
+class TestSearchStats(unittest.TestCase):
+    def test_recursive_counts_nodes(self):
+        stats = SearchStats()
+        calculate_path_rec(DATA[0], DATA[0], DATA[1:], [], 0, stats=stats)
+        # 1 + 4 + 4*3 + 4*3*2 + 4! вершин дерева перебора
+        self.assertEqual(stats.nodes, 65)
+
+    def test_phases_and_callback(self):
+        phases = []
+        for size in (8, 12, 20):
+            stats = SearchStats(callback=lambda name, _: phases.append(name))
+            calculate_path(random_points(size, size), stats=stats)
+            self.assertGreater(stats.nodes, 0)
+            self.assertGreater(stats.distance_evaluations, 0)
+        stats = SearchStats(callback=lambda name, _: phases.append(name))
+        calculate_path(random_points(60, 60), stats=stats)
+        self.assertGreater(stats.nodes, 0)
+        self.assertEqual(phases[:2], ["distance_matrix", "search"])
+        self.assertEqual(phases[-3:], ["neighbours", "construction", "local_search"])
+
+    def test_exhaustive_prunes(self):
+        stats = SearchStats()
+        calculate_path_exhaustive(distance_matrix(random_points(9, 1)), stats)
+        self.assertGreater(stats.pruned, 0)
+        self.assertLess(stats.nodes, 8 * 7 * 6 * 5 * 4 * 3 * 2)
+
+
+class TestApproximation(unittest.TestCase):
+    def test_guarantees_hold(self):
+        for seed in range(5):
+            distances = distance_matrix(random_points(10, seed))
+            optimal = calculate_path_held_karp(distances)[0]
+            for method in ("double_tree", "christofides"):
+                path_size, result, report = calculate_path_approximation(distances, method)
+                self.assertEqual(sorted(index for index, _ in result), list(range(10)))
+                self.assertLessEqual(report["lower_bound"], optimal + 1e-9)
+                self.assertLessEqual(path_size, report["guarantee"] * optimal + 1e-9)
+                self.assertAlmostEqual(report["gap"], path_size / report["lower_bound"] - 1)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            calculate_path_approximation(distance_matrix(DATA), "greedy")
+
+
+class TestCalculatePath(unittest.TestCase):
+    def test_same_route_as_reference(self):
+        expected = calculate_path_rec(DATA[0], DATA[0], DATA[1:], [], 0)
+        self.assertEqual(calculate_path(DATA), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,272 @@
+"""
+Bitboard representation of the reverse tic-tac-toe board.
+
+Each player's stones are kept in one Python int. Cell (x, y) is bit
+x * (size + 1) + y: every row has one extra always-empty padding bit,
+so shifts along rows and diagonals never wrap onto the next row.
+
+Besides the bits the board keeps, for every line (row, column, diagonal)
+and every player, the longest run of stones in that line. A move can only
+change the four lines through its cell, so make and unmake update just those.
+
+The position is also hashed with Zobrist keys: one random 64-bit key per
+player and cell, the hash is the XOR of the keys of all stones. A move XORs
+one key in and unmake XORs the same key out. Eight hashes are kept, one per
+symmetry of the square, so the search can treat mirrored and rotated
+positions as the same one.
+
+Move generation does not scan the board either: the set of empty cells and
+the set of candidates, empty cells within radius of some stone, are updated
+on every make and unmake.
+"""
+import random
+from functools import lru_cache
+
+HUMAN = -1
+COMP = +1
+SYMMETRIES = 8
+
+
+def transform(x: int, y: int, size: int, symmetry: int) -> tuple:
+    """
+    Cell (x, y) after one of the 8 symmetries of the square
+    :param symmetry: 0 is identity, 1-3 rotations, 4-7 reflections
+    """
+    n = size - 1
+    return (
+        (x, y), (y, n - x), (n - x, n - y), (n - y, x),
+        (x, n - y), (n - x, y), (y, x), (n - y, n - x),
+    )[symmetry]
+
+
+def inverse_symmetry(symmetry: int) -> int:
+    """The symmetry that takes cells back, rotations by 90 and 270 swap, the rest undo themselves"""
+    return {1: 3, 3: 1}.get(symmetry, symmetry)
+
+
+@lru_cache(maxsize=None)
+def neighbours(size: int, radius: int) -> list:
+    """
+    :return: for cell x * size + y the cells (i, j) at most radius away in both directions, the cell itself excluded
+    """
+    cells = []
+    for x in range(size):
+        for y in range(size):
+            cells.append(tuple(
+                (i, j)
+                for i in range(max(0, x - radius), min(size, x + radius + 1))
+                for j in range(max(0, y - radius), min(size, y + radius + 1))
+                if (i, j) != (x, y)
+            ))
+    return cells
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(size: int) -> dict:
+    """
+    Keys for every player and cell, the same for every board of this size
+    :return: {player: [tuple of SYMMETRIES keys for cell x * size + y]}
+    """
+    rnd = random.Random(size)
+    base = {player: [rnd.getrandbits(64) for _ in range(size * size)] for player in (HUMAN, COMP)}
+    keys = {}
+    for player in (HUMAN, COMP):
+        keys[player] = []
+        for x in range(size):
+            for y in range(size):
+                cells = (transform(x, y, size, symmetry) for symmetry in range(SYMMETRIES))
+                keys[player].append(tuple(base[player][i * size + j] for i, j in cells))
+    return keys
+
+
+class BitBoard:
+    """Game state as one integer per player."""
+
+    def __init__(self, size: int = 10, number_for_win: int = 5, radius: int = 2) -> None:
+        """
+        :param size: the board is size x size
+        :param number_for_win: how many stones in a row finish the game
+        :param radius: empty cells this close to a stone are candidate moves
+        """
+        self.size = size
+        self.number_for_win = number_for_win
+        self.width = size + 1
+        self.bits = {HUMAN: 0, COMP: 0}
+        # right, down, down-right and down-left neighbours
+        self.directions = (1, self.width, self.width + 1, self.width - 1)
+        self.full = sum(1 << (x * self.width + y) for x in range(size) for y in range(size))
+        self.lines_per_direction = 2 * size - 1
+        self.runs = {player: [0] * (4 * self.lines_per_direction) for player in (HUMAN, COMP)}
+        self.rows = {HUMAN: 0, COMP: 0}  # how many lines hold a winning run
+        self.history = []  # (x, y, player, previous runs of the four lines)
+        self.keys = zobrist_keys(size)
+        self.hashes = [0] * SYMMETRIES  # hashes[s] is the hash of the board seen through symmetry s
+        self.empty = {(x, y) for x in range(size) for y in range(size)}
+        self.neighbours = neighbours(size, radius)
+        self.stones_near = [0] * (size * size)  # stones within radius of each cell
+        self.candidates = set()  # empty cells with a stone within radius
+
+    @classmethod
+    def from_state(cls, state: list, number_for_win: int = 5) -> "BitBoard":
+        """
+        Build a bitboard from the list-of-lists board
+        :param state: the state of the current board
+        """
+        bitboard = cls(len(state), number_for_win)
+        for x, row in enumerate(state):
+            for y, cell in enumerate(row):
+                if cell:
+                    bitboard.make(x, y, cell)
+        return bitboard
+
+    def bit(self, x: int, y: int) -> int:
+        return 1 << (x * self.width + y)
+
+    def line_ids(self, x: int, y: int) -> tuple:
+        """Indexes in runs of the row, column and two diagonals through (x, y)"""
+        lines = self.lines_per_direction
+        return (x, lines + y, 2 * lines + y - x + self.size - 1, 3 * lines + x + y)
+
+    def run_through(self, x: int, y: int, player: int, direction: int) -> int:
+        """Length of the player's run through (x, y) along the direction"""
+        stones = self.bits[player]
+        index = x * self.width + y
+        length = 1
+        for step in (direction, -direction):
+            position = index + step
+            while position >= 0 and stones >> position & 1:
+                length += 1
+                position += step
+        return length
+
+    @property
+    def hash(self) -> int:
+        """Zobrist hash of the position as it is"""
+        return self.hashes[0]
+
+    def canonical(self) -> tuple:
+        """
+        The smallest of the symmetric hashes, equal for all 8 images of the position
+        :return: (hash, symmetry that gives it)
+        """
+        hashes = self.hashes
+        symmetry = min(range(SYMMETRIES), key=hashes.__getitem__)
+        return hashes[symmetry], symmetry
+
+    def _add_stone(self, x: int, y: int) -> None:
+        self.empty.remove((x, y))
+        self.candidates.discard((x, y))
+        stones_near, size, empty = self.stones_near, self.size, self.empty
+        for cell in self.neighbours[x * size + y]:
+            index = cell[0] * size + cell[1]
+            stones_near[index] += 1
+            if stones_near[index] == 1 and cell in empty:
+                self.candidates.add(cell)
+
+    def _remove_stone(self, x: int, y: int) -> None:
+        stones_near, size = self.stones_near, self.size
+        for cell in self.neighbours[x * size + y]:
+            index = cell[0] * size + cell[1]
+            stones_near[index] -= 1
+            if stones_near[index] == 0:
+                self.candidates.discard(cell)
+        self.empty.add((x, y))
+        if stones_near[x * size + y]:
+            self.candidates.add((x, y))
+
+    def _toggle_hash(self, x: int, y: int, player: int) -> None:
+        hashes = self.hashes
+        for symmetry, key in enumerate(self.keys[player][x * self.size + y]):
+            hashes[symmetry] ^= key
+
+    @property
+    def last_move(self):
+        """(x, y, player) of the last move or None"""
+        return self.history[-1][:3] if self.history else None
+
+    def make(self, x: int, y: int, player: int) -> None:
+        """Put the player's stone on (x, y) and update the four lines through it"""
+        self.bits[player] |= self.bit(x, y)
+        runs = self.runs[player]
+        lines = self.line_ids(x, y)
+        previous = tuple(runs[line] for line in lines)
+        for line, direction, old in zip(lines, self.directions, previous):
+            length = self.run_through(x, y, player, direction)
+            if length > old:
+                runs[line] = length
+                if length >= self.number_for_win > old:
+                    self.rows[player] += 1
+        self.history.append((x, y, player, previous))
+        self._toggle_hash(x, y, player)
+        self._add_stone(x, y)
+
+    def unmake(self, x: int, y: int, player: int) -> None:
+        """Take back the last move, which must be the player's stone on (x, y)"""
+        previous = self.history.pop()[3]
+        self.bits[player] &= ~self.bit(x, y)
+        self._toggle_hash(x, y, player)
+        self._remove_stone(x, y)
+        runs = self.runs[player]
+        for line, old in zip(self.line_ids(x, y), previous):
+            if runs[line] >= self.number_for_win > old:
+                self.rows[player] -= 1
+            runs[line] = old
+
+    def last_move_wins(self) -> bool:
+        """True if the last move made a row of number_for_win"""
+        if not self.history:
+            return False
+        x, y, player, _ = self.history[-1]
+        return any(self.run_through(x, y, player, direction) >= self.number_for_win for direction in self.directions)
+
+    def wins(self, player: int) -> bool:
+        """
+        Test if the player has number_for_win stones in a row, O(1) from the line counters
+        :param player: a human or a computer
+        :return: True if the player wins
+        """
+        return self.rows[player] > 0
+
+    def has_row(self, player: int) -> bool:
+        """
+        Test if the player has number_for_win stones in a row by scanning the whole board.
+        For each direction runs are doubled with shift-and-AND:
+        after the loop a bit survives only if a whole run starts there.
+        :param player: a human or a computer
+        :return: True if the player has a row
+        """
+        stones = self.bits[player]
+        for direction in self.directions:
+            run = stones
+            length = 1
+            while length < self.number_for_win:
+                step = min(length, self.number_for_win - length)
+                run &= run >> (direction * step)
+                length += step
+            if run:
+                return True
+        return False
+
+    def is_empty(self, x: int, y: int) -> bool:
+        """True if (x, y) is on the board and free"""
+        return (x, y) in self.empty
+
+    def candidate_moves(self) -> list:
+        """
+        Moves worth searching: empty cells near the stones, all empty cells while the board is empty
+        :return: a list of (x, y)
+        """
+        return list(self.candidates or self.empty)
+
+    def empty_cells(self) -> list:
+        """
+        :return: a list of empty cells [x, y]
+        """
+        empty = self.full & ~(self.bits[HUMAN] | self.bits[COMP])
+        cells = []
+        while empty:
+            low = empty & -empty
+            x, y = divmod(low.bit_length() - 1, self.width)
+            cells.append([x, y])
+            empty ^= low
+        return cells
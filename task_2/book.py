@@ -0,0 +1,206 @@
+"""
+Opening book and solved endgames for the computer move.
+
+The book is built offline. Opening positions are all positions of the first
+few plies, one per symmetry class, searched by the engine for much longer
+than a move in the game gets. Endgames are positions with a few empty cells
+left, reached by the engine playing itself after a few random opening moves,
+and solved to the end. Random boards that only avoid rows are not used: a
+real game almost never reaches them.
+
+The file is a hash table with open addressing: a header and fixed-size
+slots of (key, x, y, kind, score), the slot is found from the low bits of
+the key. The game maps the file with mmap and reads only the slots it
+probes, so the book is never loaded into Python objects.
+"""
+import argparse
+import mmap
+import random
+import struct
+import sys
+import time
+
+from bitboard import COMP, HUMAN, inverse_symmetry, transform
+from engine import WIN_SCORE, AlphaBeta
+from evaluation import PatternBoard, pattern_evaluation
+from transposition import TranspositionTable, position_key
+
+MAGIC = b"RTTB"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBII")  # magic, version, size, number_for_win, slots, entries
+SLOT = struct.Struct("<QBBBxi")  # key, x, y, kind, score
+OPENING = 1
+ENDGAME = 2
+
+
+def write_book(path: str, entries: dict, size: int = 10, number_for_win: int = 5) -> None:
+    """
+    :param entries: {key: (x, y, kind, score)}, the move in the orientation of the key
+    """
+    slots = 1
+    while slots < 2 * len(entries):
+        slots *= 2
+    mask = slots - 1
+    data = bytearray(HEADER.size + slots * SLOT.size)
+    HEADER.pack_into(data, 0, MAGIC, VERSION, size, number_for_win, slots, len(entries))
+    for key, (x, y, kind, score) in entries.items():
+        slot = key & mask
+        while data[HEADER.size + slot * SLOT.size + 10]:  # занятый слот, kind != 0
+            slot = (slot + 1) & mask
+        SLOT.pack_into(data, HEADER.size + slot * SLOT.size, key, x, y, kind, score)
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+class OpeningBook:
+    """Read-only view of a book file."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.number_for_win, slots, self.entries = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError(f"{path} is not an opening book")
+        self.mask = slots - 1
+        self.lookups = 0
+        self.hits = 0
+
+    def close(self) -> None:
+        self.data.close()
+
+    def lookup(self, state, player: int = COMP):
+        """
+        :param state: current BitBoard of the game
+        :param player: the side to move
+        :return: [x, y, score] for the current board or None if the position is not in the book
+        """
+        if state.size != self.size or state.number_for_win != self.number_for_win:
+            return None
+        self.lookups += 1
+        key, symmetry = position_key(state, player)
+        slot = key & self.mask
+        while True:
+            stored, x, y, kind, score = SLOT.unpack_from(self.data, HEADER.size + slot * SLOT.size)
+            if not kind:
+                return None
+            if stored == key:
+                break
+            slot = (slot + 1) & self.mask
+        x, y = transform(x, y, self.size, inverse_symmetry(symmetry))
+        if not state.is_empty(x, y):
+            return None
+        self.hits += 1
+        return [x, y, score]
+
+
+def opening_positions(size: int, number_for_win: int, plies: int):
+    """
+    Positions of the first plies where the computer is to move, one per symmetry class
+    :return: generator of PatternBoard, the same board object changed between the yields
+    """
+    seen = set()
+
+    def walk(state, player, ply):
+        key = position_key(state, player)[0]
+        if key in seen:
+            return
+        seen.add(key)
+        if player == COMP:
+            yield state
+        if ply == plies:
+            return
+        for x, y in state.empty_cells():
+            state.make(x, y, player)
+            yield from walk(state, -player, ply + 1)
+            state.unmake(x, y, player)
+
+    for first in (COMP, HUMAN):
+        yield from walk(PatternBoard(size, number_for_win), first, 0)
+
+
+def self_play_endgame(rnd: random.Random, size: int, number_for_win: int, empty: int,
+                      depth: int = 2, random_plies: int = 4):
+    """
+    Play the engine against itself until empty cells are left
+    :param depth: search depth of every self-play move
+    :param random_plies: the first moves are random, so the games differ
+    :return: PatternBoard with the computer to move or None if a player made a row
+    """
+    state = PatternBoard(size, number_for_win)
+    engine = AlphaBeta(pattern_evaluation, max_depth=depth)
+    player = COMP if (size * size - empty) % 2 == 0 else HUMAN
+    ply = 0
+    while len(state.empty) > empty:
+        if ply < random_plies:
+            x, y = rnd.choice(sorted(state.empty))
+        else:
+            x, y, _ = engine.search(state, player, time_budget=float("inf"))
+        state.make(x, y, player)
+        if state.wins(player):
+            return None
+        player = -player
+        ply += 1
+    return state
+
+
+def build_book(size: int = 10, number_for_win: int = 5, plies: int = 2, move_time: float = 2.0,
+               endgames: int = 200, endgame_empty: int = 8, self_play_depth: int = 2, seed: int = 0,
+               log=None) -> dict:
+    """
+    :param plies: depth of the opening tree
+    :param move_time: seconds of search per opening position
+    :param endgames: number of endgames to solve
+    :param endgame_empty: empty cells in an endgame
+    :param self_play_depth: search depth of the self-play games that reach the endgames
+    :return: {key: (x, y, kind, score)} for write_book
+    """
+    entries = {}
+    for state in opening_positions(size, number_for_win, plies):
+        engine = AlphaBeta(pattern_evaluation, table=TranspositionTable(18, symmetry=True))
+        x, y, score = engine.search(state, COMP, move_time)
+        key, symmetry = position_key(state, COMP)
+        entries[key] = (*transform(x, y, size, symmetry), OPENING, score)
+        if log is not None:
+            log(f"opening {len(entries)}: depth {engine.depth}, move ({x}, {y}), score {score}")
+
+    rnd = random.Random(seed)
+    solved = 0
+    while solved < endgames:
+        state = self_play_endgame(rnd, size, number_for_win, endgame_empty, self_play_depth)
+        if state is None:
+            continue
+        key, symmetry = position_key(state, COMP)
+        if key in entries:
+            continue
+        engine = AlphaBeta(max_depth=endgame_empty, table=TranspositionTable(16))
+        x, y, score = engine.search(state, COMP, time_budget=float("inf"))
+        if engine.depth < endgame_empty and abs(score) < WIN_SCORE - endgame_empty:
+            continue  # не решено до конца
+        entries[key] = (*transform(x, y, size, symmetry), ENDGAME, score)
+        solved += 1
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the opening book and endgames for the reverse game")
+    parser.add_argument("output", help="book file")
+    parser.add_argument("--plies", type=int, default=2)
+    parser.add_argument("--move-time", type=float, default=2.0)
+    parser.add_argument("--endgames", type=int, default=200)
+    parser.add_argument("--endgame-empty", type=int, default=8)
+    parser.add_argument("--self-play-depth", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    entries = build_book(
+        plies=args.plies, move_time=args.move_time, endgames=args.endgames,
+        endgame_empty=args.endgame_empty, self_play_depth=args.self_play_depth, seed=args.seed, log=lambda line: print(line, file=sys.stderr),
+    )
+    write_book(args.output, entries)
+    print(f"{len(entries)} positions in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
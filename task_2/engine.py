@@ -0,0 +1,219 @@
+"""
+Alpha-beta search for the computer player.
+
+Negamax with alpha-beta pruning and iterative deepening: depth 1, 2, 3...
+is searched until the time budget for the move runs out, and the move of
+the last finished depth is played. Moves that caused a cutoff are tried
+first later on: two killer moves per ply and a history table over cells.
+With a transposition table a position met again through another move order
+is not searched twice, and its best move is tried first.
+The root tries every empty cell, deeper nodes only the board's candidates
+near the stones: a quiet move far from everything is often the safest one
+in the reverse game, so it is never cut at the root, and deeper down the
+other empty cells are searched too when every candidate loses.
+"""
+import time
+
+from bitboard import COMP
+from transposition import EXACT, LOWER, UPPER
+
+WIN_SCORE = 1_000_000  # score of a won position, minus the ply it is reached at
+
+
+class SearchTimeout(Exception):
+    """The time budget of the move is over."""
+
+
+def terminal_evaluation(state, player: int) -> int:
+    """
+    Leaf score when nothing else is known
+    :param state: current BitBoard of the game
+    :param player: the side to move
+    :return: always 0, the game is decided only by rows
+    """
+    return 0
+
+
+class AlphaBeta:
+    """Iterative deepening negamax with killer and history move ordering."""
+
+    def __init__(self, evaluate=terminal_evaluation, max_depth: int = 64, table=None) -> None:
+        """
+        :param evaluate: leaf evaluation evaluate(state, player), score for the side to move
+        :param max_depth: deepest iteration of the search
+        :param table: TranspositionTable or None
+        """
+        self.evaluate = evaluate
+        self.max_depth = max_depth
+        self.table = table
+        self.killers = {}
+        self.history = {}
+        self.nodes = 0
+        self.deadline = None
+        self.depth = 0  # last finished depth
+
+    def order_moves(self, moves: list, ply: int, first=None) -> list:
+        """Best move of the previous iteration, killers, then by history score"""
+        killers = self.killers.get(ply, ())
+        history = self.history
+
+        def key(move):
+            move = tuple(move)
+            if move == first:
+                return (0, 0)
+            if move in killers:
+                return (1, 0)
+            return (2, -history.get(move, 0))
+
+        return sorted(moves, key=key)
+
+    def negamax(self, state, depth: int, alpha: float, beta: float, player: int, ply: int) -> float:
+        """
+        :param state: current BitBoard of the game
+        :param depth: remaining depth
+        :param player: the side to move
+        :param ply: distance from the root
+        :return: score for the side to move
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+        # в обратных крестиках-ноликах ряд из пяти означает проигрыш того, кто его построил
+        if state.wins(-player):
+            return WIN_SCORE - ply
+        if not state.empty:
+            return 0
+        if depth == 0:
+            return self.evaluate(state, player)
+
+        table = self.table
+        first = None
+        if table is not None:
+            entry = table.probe(state, player)
+            if entry is not None:
+                entry_depth, bound, score, first = entry
+                if entry_depth >= depth:
+                    score = self._from_table(score, ply)
+                    if bound == EXACT:
+                        return score
+                    if bound == LOWER:
+                        alpha = max(alpha, score)
+                    else:
+                        beta = min(beta, score)
+                    if alpha >= beta:
+                        return score
+        alpha_start = alpha
+
+        best = -WIN_SCORE - 1
+        best_move = None
+        moves = self.order_moves(state.candidate_moves(), ply, first)
+        widened = len(moves) == len(state.empty)
+        index = 0
+        while True:
+            if index == len(moves):
+                if widened or best > -WIN_SCORE + self.max_depth:
+                    break
+                # рядом с камнями только проигрыш: в обратной игре спасти может тихий ход вдали,
+                # без него проигрыш не доказан, поэтому перебираем и остальные пустые клетки
+                taken = set(moves)
+                moves += [cell for cell in sorted(state.empty) if cell not in taken]
+                widened = True
+                continue
+            x, y = moves[index]
+            index += 1
+            state.make(x, y, player)
+            try:
+                score = -self.negamax(state, depth - 1, -beta, -alpha, -player, ply + 1)
+            finally:
+                state.unmake(x, y, player)
+            if score > best:
+                best = score
+                best_move = (x, y)
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        self._remember_cutoff((x, y), depth, ply)
+                        break
+
+        if table is not None:
+            if best <= alpha_start:
+                bound = UPPER
+            elif best >= beta:
+                bound = LOWER
+            else:
+                bound = EXACT
+            table.store(state, player, depth, bound, self._to_table(best, ply), best_move)
+        return best
+
+    def _to_table(self, score: int, ply: int) -> int:
+        """Won scores are kept as the distance from the stored position, not from the root"""
+        if score >= WIN_SCORE - self.max_depth:
+            return score + ply
+        if score <= -WIN_SCORE + self.max_depth:
+            return score - ply
+        return score
+
+    def _from_table(self, score: int, ply: int) -> int:
+        if score >= WIN_SCORE - self.max_depth:
+            return score - ply
+        if score <= -WIN_SCORE + self.max_depth:
+            return score + ply
+        return score
+
+    def _remember_cutoff(self, move: tuple, depth: int, ply: int) -> None:
+        self.history[move] = self.history.get(move, 0) + depth * depth
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+
+    def search(self, state, player: int = COMP, time_budget: float = 1.0) -> list:
+        """
+        Choose a move within the time budget
+        :param state: current BitBoard of the game
+        :param player: the side to move
+        :param time_budget: seconds for the move
+        :return: a list with [the best row, best col, best score], the score is for player
+        """
+        start = time.perf_counter()
+        self.deadline = start + time_budget
+        self.killers = {}
+        self.nodes = 0
+        self.depth = 0
+        if self.table is not None:
+            self.table.new_search()
+        moves = state.empty_cells()
+        if not moves:
+            return [-1, -1, 0]
+        best = [moves[0][0], moves[0][1], 0]
+
+        for depth in range(1, min(self.max_depth, len(moves)) + 1):
+            try:
+                result = self.search_moves(state, player, depth, self.order_moves(moves, 0, (best[0], best[1])))
+            except SearchTimeout:
+                break
+            best = result
+            self.depth = depth
+            if abs(best[2]) >= WIN_SCORE - self.max_depth:
+                break  # исход уже известен
+        self.deadline = None
+        return best
+
+    def search_moves(self, state, player: int, depth: int, moves: list) -> list:
+        """
+        Search the root moves in the given order, the first of equal moves wins
+        :return: [x, y, score] of the best move, its score is exact
+        """
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best = None
+        for x, y in moves:
+            state.make(x, y, player)
+            try:
+                score = -self.negamax(state, depth - 1, -beta, -alpha, -player, 1)
+            finally:
+                state.unmake(x, y, player)
+            if best is None or score > best[2]:
+                best = [x, y, score]
+                alpha = max(alpha, score)
+        return best
@@ -0,0 +1,94 @@
+"""
+Pattern evaluation for the reverse game.
+
+Whoever builds number_for_win in a row loses, so the player's own stones
+lined up are a danger: late in the game the free cells run out and a player
+may be forced to finish their own row. Every window of number_for_win cells
+of a line that the opponent has not blocked is scored by how many of the
+player's stones it holds, so open fours count twice, and broken shapes such
+as xx.xx, where one stone finishes the row, count like the solid ones.
+
+The stones of every line are kept packed into small ints, a move sets one
+bit in each of the four lines through its cell, and the score of a line is
+looked up by its packed contents. An update is O(1) once the cache is warm,
+only a line never seen before costs a scan of its windows.
+"""
+from bitboard import COMP, HUMAN, BitBoard
+
+# danger of a window by the number of the player's stones in it, the opponent's stones block the window
+WINDOW_WEIGHTS = {2: 1, 3: 10, 4: 100}
+
+_line_cache = {}  # (own, other, length, number_for_win) -> danger, at most 3 ** size lines per length
+
+
+def line_danger(own: int, other: int, length: int, number_for_win: int = 5) -> int:
+    """
+    Danger of the player's stones in one line
+    :param own: the player's stones, bit i is the i-th cell of the line
+    :param other: the opponent's stones in the same form
+    :param length: number of cells in the line
+    :return: sum of WINDOW_WEIGHTS of the windows free of the opponent
+    """
+    key = (own, other, length, number_for_win)
+    if key in _line_cache:
+        return _line_cache[key]
+
+    danger = 0
+    window = (1 << number_for_win) - 1
+    for start in range(length - number_for_win + 1):
+        if not other >> start & window:
+            danger += WINDOW_WEIGHTS.get(bin(own >> start & window).count("1"), 0)
+
+    _line_cache[key] = danger
+    return danger
+
+
+class PatternBoard(BitBoard):
+    """BitBoard that also keeps the pattern danger of every line for both players."""
+
+    def __init__(self, size: int = 10, number_for_win: int = 5) -> None:
+        super().__init__(size, number_for_win)
+        lines = 4 * self.lines_per_direction
+        # for every cell the (line, place of the cell in the line) of its four lines
+        self.line_places = []
+        self.line_lengths = [0] * lines
+        for x in range(size):
+            for y in range(size):
+                places = []
+                for line in self.line_ids(x, y):
+                    places.append((line, self.line_lengths[line]))
+                    self.line_lengths[line] += 1
+                self.line_places.append(tuple(places))
+        self.line_bits = {player: [0] * lines for player in (HUMAN, COMP)}  # stones of each line packed
+        self.danger = {player: [0] * lines for player in (HUMAN, COMP)}
+        self.total_danger = {HUMAN: 0, COMP: 0}
+
+    def _rescore(self, x: int, y: int, player: int) -> None:
+        """Flip the stone of (x, y) in its four packed lines and rescore them"""
+        human_bits, comp_bits = self.line_bits[HUMAN], self.line_bits[COMP]
+        own_bits = self.line_bits[player]
+        for line, place in self.line_places[x * self.size + y]:
+            own_bits[line] ^= 1 << place
+            human, comp = human_bits[line], comp_bits[line]
+            for side, own, other in ((HUMAN, human, comp), (COMP, comp, human)):
+                value = line_danger(own, other, self.line_lengths[line], self.number_for_win)
+                self.total_danger[side] += value - self.danger[side][line]
+                self.danger[side][line] = value
+
+    def make(self, x: int, y: int, player: int) -> None:
+        super().make(x, y, player)
+        self._rescore(x, y, player)
+
+    def unmake(self, x: int, y: int, player: int) -> None:
+        super().unmake(x, y, player)
+        self._rescore(x, y, player)
+
+
+def pattern_evaluation(state: PatternBoard, player: int) -> int:
+    """
+    Leaf score for the AlphaBeta engine, read from the totals kept by the board
+    :param state: current PatternBoard of the game
+    :param player: the side to move
+    :return: the opponent's danger minus the player's own
+    """
+    return state.total_danger[-player] - state.total_danger[player]
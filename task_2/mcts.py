@@ -0,0 +1,256 @@
+"""
+Monte Carlo tree search for the computer move.
+
+UCT: from the root the child with the best win rate plus exploration bonus
+is followed down to a node with untried moves, one of them is added to the
+tree, and the game is finished with random moves. The result is counted in
+every node of the path. The move visited most at the root is played.
+
+Playouts do not use BitBoard: the stones are copied into two ints and the
+empty cells into a shuffled list, and after each random move only the four
+lines through it are checked for a row, who makes a row loses.
+
+The tree is kept between moves: the next search starts from the node of the
+position reached, if the moves since are in the tree. With several workers
+every worker is a process of its own that grows one tree, kept there between
+moves, and the root statistics of the trees are summed.
+"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import log, sqrt
+
+from bitboard import COMP
+
+
+class Node:
+    """Position in the tree, reached by player's move."""
+
+    __slots__ = ("move", "player", "parent", "children", "untried", "visits", "reward", "winner", "terminal")
+
+    def __init__(self, move, player: int, parent=None) -> None:
+        self.move = move
+        self.player = player  # who made the move, the reward is counted for this side
+        self.parent = parent
+        self.children = {}
+        self.untried = []
+        self.visits = 0
+        self.reward = 0.0  # 1 for a won playout, 0.5 for a draw
+        self.winner = 0
+        self.terminal = False
+
+
+def playout(state, player: int, rnd: random.Random) -> int:
+    """
+    Finish the game with random moves on a copy of the stones
+    :param state: current BitBoard of the game
+    :param player: the side to move
+    :return: the winner, 0 for a draw
+    """
+    width, need = state.width, state.number_for_win
+    directions = state.directions
+    stones = dict(state.bits)
+    cells = [x * width + y for x, y in state.empty]
+    rnd.shuffle(cells)
+    for position in cells:
+        mine = stones[player] | 1 << position
+        stones[player] = mine
+        for direction in directions:
+            length = 1
+            step = position + direction
+            while mine >> step & 1:
+                length += 1
+                step += direction
+            step = position - direction
+            while step >= 0 and mine >> step & 1:
+                length += 1
+                step -= direction
+            if length >= need:
+                return -player  # в обратной игре ряд построил проигравший
+        player = -player
+    return 0
+
+
+class MCTS:
+    """UCT player with the AlphaBeta search() contract."""
+
+    def __init__(self, exploration: float = 1.4, playouts=None, seed: int = 0, workers: int = 1) -> None:
+        """
+        :param exploration: weight of the UCT exploration term
+        :param playouts: playouts per move, None to use only the time budget
+        :param seed: random moves of the playouts
+        :param workers: processes with their own trees, merged at the root
+        """
+        self.exploration = exploration
+        self.playouts = playouts
+        self.seed = seed
+        self.workers = workers
+        self.rnd = random.Random(seed)
+        self.root = None
+        self.root_moves = ()  # (x, y, player) of the moves up to the root
+        self.pools = []  # one single-process pool per worker, so each tree stays in its process
+        self.played = 0  # playouts of the last search
+        self.seconds = 0.0
+
+    def close(self) -> None:
+        for pool in self.pools:
+            pool.shutdown()
+        self.pools = []
+
+    @property
+    def playouts_per_second(self) -> float:
+        return self.played / self.seconds if self.seconds else 0.0
+
+    def _new_node(self, state, move, player: int, parent) -> Node:
+        node = Node(move, player, parent)
+        if move is not None and state.wins(player):
+            node.terminal, node.winner = True, -player
+        elif not state.empty:
+            node.terminal = True
+        else:
+            node.untried = [tuple(cell) for cell in state.empty_cells()]
+        return node
+
+    def _reuse_root(self, state, player: int) -> Node:
+        """The node of the current position from the last tree or a new root"""
+        history = tuple((x, y, mover) for x, y, mover, _ in state.history)
+        node = self.root
+        if node is not None and history[:len(self.root_moves)] == self.root_moves:
+            for x, y, mover in history[len(self.root_moves):]:
+                node = node.children.get((x, y))
+                if node is None or node.player != mover:
+                    node = None
+                    break
+        else:
+            node = None
+        if node is None or node.player != -player:
+            node = self._new_node(state, None, -player, None)
+        node.parent = None
+        self.root, self.root_moves = node, history
+        return node
+
+    def _select(self, node: Node) -> Node:
+        scale = self.exploration * sqrt(log(node.visits))
+        return max(
+            node.children.values(),
+            key=lambda child: child.reward / child.visits + scale / sqrt(child.visits),
+        )
+
+    def grow(self, state, player: int, time_budget=None, playouts=None) -> Node:
+        """
+        Grow the tree of the current position
+        :param state: current BitBoard of the game, it is the same after the call
+        :param player: the side to move
+        :param time_budget: seconds, None for no limit
+        :param playouts: number of playouts, None for no limit
+        :return: the root node
+        """
+        if time_budget is None and playouts is None:
+            raise ValueError("MCTS needs a time budget or a playout budget")
+        start = time.perf_counter()
+        root = self._reuse_root(state, player)
+        rnd = self.rnd
+        self.played = 0
+        while not root.terminal:
+            if playouts is not None and self.played >= playouts:
+                break
+            if time_budget is not None and time.perf_counter() - start > time_budget:
+                break
+            node = root
+            path = [root]
+            while not node.untried and not node.terminal:
+                node = self._select(node)
+                state.make(node.move[0], node.move[1], node.player)
+                path.append(node)
+            if not node.terminal:
+                index = rnd.randrange(len(node.untried))
+                node.untried[index], node.untried[-1] = node.untried[-1], node.untried[index]
+                move = node.untried.pop()
+                state.make(move[0], move[1], -node.player)
+                child = self._new_node(state, move, -node.player, node)
+                node.children[move] = child
+                node = child
+                path.append(node)
+            winner = node.winner if node.terminal else playout(state, -node.player, rnd)
+            for visited in path:
+                visited.visits += 1
+                if winner == visited.player:
+                    visited.reward += 1
+                elif winner == 0:
+                    visited.reward += 0.5
+            for visited in reversed(path[1:]):
+                state.unmake(visited.move[0], visited.move[1], visited.player)
+            self.played += 1
+        self.seconds = time.perf_counter() - start
+        return root
+
+    def search(self, state, player: int = COMP, time_budget=1.0) -> list:
+        """
+        Choose a move within the time budget or the playout budget
+        :param state: current BitBoard of the game
+        :param player: the side to move
+        :param time_budget: seconds for the move, None to use only the playout budget
+        :return: a list with [the best row, best col, best score], the score is the win rate from -1 to +1
+        """
+        if time_budget is None and self.playouts is None:
+            raise ValueError("MCTS needs a time budget or a playout budget")
+        if self.workers > 1:
+            statistics = self._grow_parallel(state, player, time_budget)
+        else:
+            root = self.grow(state, player, time_budget, self.playouts)
+            statistics = root_statistics(root)
+        if not statistics:
+            return [-1, -1, 0]
+        # самый посещаемый ход; при равенстве берём меньшую клетку
+        move = max(sorted(statistics), key=lambda cell: statistics[cell][0])
+        visits, reward = statistics[move]
+        return [move[0], move[1], 2 * reward / visits - 1]
+
+    def _grow_parallel(self, state, player: int, time_budget) -> dict:
+        if not self.pools:
+            self.pools = [
+                ProcessPoolExecutor(
+                    1, initializer=_init_worker, initargs=(self.exploration, self.seed * 1_000_003 + worker)
+                )
+                for worker in range(self.workers)
+            ]
+        start = time.perf_counter()
+        playouts = None if self.playouts is None else -(-self.playouts // self.workers)
+        futures = [pool.submit(_grow_worker, state, player, time_budget, playouts) for pool in self.pools]
+        statistics = {}
+        self.played = 0
+        for future in futures:
+            worker_statistics, played = future.result()
+            self.played += played
+            for move, (visits, reward) in worker_statistics.items():
+                total = statistics.get(move, (0, 0.0))
+                statistics[move] = (total[0] + visits, total[1] + reward)
+        self.seconds = time.perf_counter() - start
+        return statistics
+
+
+def root_statistics(root: Node) -> dict:
+    """{move: (visits, reward)} of the root children"""
+    return {move: (child.visits, child.reward) for move, child in root.children.items() if child.visits}
+
+
+_tree = None  # MCTS of the worker process, kept between moves
+
+
+def _init_worker(exploration: float, seed: int) -> None:
+    global _tree
+    _tree = MCTS(exploration, seed=seed)
+
+
+def _grow_worker(state, player: int, time_budget, playouts):
+    """
+    :return: (root statistics, playouts) of the process's tree
+    """
+    tree = _tree
+    root = tree.grow(state, player, time_budget, playouts)
+    return root_statistics(root), tree.played
+
+
+def _root_visits() -> int:
+    """Visits of the root of the process's tree"""
+    return _tree.root.visits if _tree.root is not None else 0
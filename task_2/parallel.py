@@ -0,0 +1,163 @@
+"""
+Root-split parallel search for the computer move.
+
+Iterative deepening runs in the main process. At every depth the root moves
+are dealt round-robin to a pool of processes, each worker searches its share
+with alpha-beta and returns its best move. The best move of a share has an
+exact score, so the best over the workers is the same whatever the number of
+workers: with a fixed depth and seed the chosen move does not depend on it.
+With a time budget the last depth that every worker finished is played.
+
+Each worker keeps its own engine and transposition table between moves.
+"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import COMP, HUMAN
+from engine import WIN_SCORE, AlphaBeta, SearchTimeout, terminal_evaluation
+from evaluation import PatternBoard, pattern_evaluation
+from transposition import TranspositionTable
+
+_engine = None  # AlphaBeta of the worker process
+
+
+def _init_worker(evaluate, max_depth: int, table_bits, symmetry: bool) -> None:
+    global _engine
+    table = TranspositionTable(table_bits, symmetry) if table_bits else None
+    _engine = AlphaBeta(evaluate, max_depth, table)
+
+
+def _search_share(state, player: int, depth: int, moves: list, time_left):
+    """
+    :return: ([x, y, score], nodes) of the worker's moves, None instead of the move if time ran out
+    """
+    engine = _engine
+    engine.nodes = 0
+    engine.killers = {}
+    engine.deadline = None if time_left is None else time.perf_counter() + time_left
+    if engine.table is not None:
+        engine.table.new_search()
+    try:
+        return engine.search_moves(state, player, depth, moves), engine.nodes
+    except SearchTimeout:
+        return None, engine.nodes
+    finally:
+        engine.deadline = None
+
+
+class ParallelSearch:
+    """Same search() contract as AlphaBeta, the root moves are split over processes."""
+
+    def __init__(self, workers: int = 4, evaluate=terminal_evaluation, max_depth: int = 64,
+                 table_bits=18, symmetry: bool = False, seed: int = 0) -> None:
+        """
+        :param workers: number of processes
+        :param evaluate: leaf evaluation, a module-level function so it can be sent to the workers
+        :param max_depth: deepest iteration of the search
+        :param table_bits: size of each worker's TranspositionTable, None for no table
+        :param seed: order of the root moves, equal scores are broken by it
+        """
+        self.workers = workers
+        self.max_depth = max_depth
+        self.seed = seed
+        self.initargs = (evaluate, max_depth, table_bits, symmetry)
+        self.pool = None
+        self.nodes = 0
+        self.seconds = 0.0
+        self.depth = 0  # last finished depth
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=self.initargs)
+        return self.pool
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    def search(self, state, player: int = COMP, time_budget=1.0) -> list:
+        """
+        Choose a move within the time budget
+        :param state: current BitBoard of the game
+        :param player: the side to move
+        :param time_budget: seconds for the move, None to search up to max_depth
+        :return: a list with [the best row, best col, best score], the score is for player
+        """
+        start = time.perf_counter()
+        self.nodes = 0
+        self.depth = 0
+        moves = [tuple(move) for move in state.empty_cells()]
+        if not moves:
+            return [-1, -1, 0]
+        random.Random(self.seed).shuffle(moves)
+        best = [moves[0][0], moves[0][1], 0]
+        pool = self._pool()
+
+        for depth in range(1, min(self.max_depth, len(moves)) + 1):
+            first = (best[0], best[1])
+            ordered = [first] + [move for move in moves if move != first]
+            time_left = None if time_budget is None else time_budget - (time.perf_counter() - start)
+            if time_left is not None and time_left <= 0:
+                break
+            futures = [
+                pool.submit(_search_share, state, player, depth, ordered[worker::self.workers], time_left)
+                for worker in range(self.workers)
+                if ordered[worker::self.workers]
+            ]
+            results = [future.result() for future in futures]
+            self.nodes += sum(nodes for _, nodes in results)
+            if any(result is None for result, _ in results):
+                break
+            # лучший ход каждой доли точен; при равенстве берём ход, стоящий раньше в общем порядке
+            shares = [result for result, _ in results]
+            best = max(shares, key=lambda move: (move[2], -ordered.index((move[0], move[1]))))
+            self.depth = depth
+            if abs(best[2]) >= WIN_SCORE - self.max_depth:
+                break  # исход уже известен
+
+        self.seconds = time.perf_counter() - start
+        return best
+
+
+def measure_speedup(state, player: int = COMP, depth: int = 2, worker_counts=(1, 2, 4, 8, 16), **kwargs) -> list:
+    """
+    Search the same position to the same depth with different numbers of processes.
+    :return: a list of {"workers", "seconds", "nodes", "nodes_per_second", "speedup", "move"}
+    """
+    rows = []
+    for workers in worker_counts:
+        search = ParallelSearch(workers, max_depth=depth, **kwargs)
+        list(search._pool().map(abs, range(workers)))  # запуск процессов не входит в замер
+        move = search.search(state, player, time_budget=None)
+        search.close()
+        rows.append({
+            "workers": workers,
+            "seconds": search.seconds,
+            "nodes": search.nodes,
+            "nodes_per_second": search.nodes_per_second,
+            "move": move,
+        })
+    for row in rows:
+        row["speedup"] = rows[0]["seconds"] / row["seconds"]
+    return rows
+
+
+def main():
+    state = PatternBoard()
+    for x, y, player in ((4, 4, COMP), (5, 5, HUMAN), (3, 6, COMP), (6, 3, HUMAN)):
+        state.make(x, y, player)
+    for row in measure_speedup(state, COMP, depth=3, evaluate=pattern_evaluation):
+        print(
+            f"workers={row['workers']}: {row['seconds']:.2f} s, {row['nodes_per_second']:.0f} nodes/s, "
+            f"speedup {row['speedup']:.2f}, move {row['move']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
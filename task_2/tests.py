@@ -0,0 +1,432 @@
+import os
+import random
+import tempfile
+import time
+import unittest
+
+from bitboard import COMP, HUMAN, SYMMETRIES, BitBoard, transform
+from book import ENDGAME, HEADER, SLOT, OpeningBook, build_book, self_play_endgame, write_book
+from engine import WIN_SCORE, AlphaBeta
+from evaluation import PatternBoard, line_danger, pattern_evaluation
+from mcts import MCTS, _root_visits, playout
+from parallel import ParallelSearch
+from tic_tac_toe import minimax, wins
+from transposition import EXACT, TranspositionTable
+
+
+def random_state(rnd: random.Random, stones: int) -> list:
+    state = [[0] * 10 for _ in range(10)]
+    for _ in range(stones):
+        state[rnd.randrange(10)][rnd.randrange(10)] = rnd.choice([HUMAN, COMP])
+    return state
+
+
+def has_row(state: list, player: int) -> bool:
+    for x in range(10):
+        for y in range(10):
+            for dx, dy in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(x + k * dx, y + k * dy) for k in range(5)]
+                if all(0 <= i < 10 and 0 <= j < 10 and state[i][j] == player for i, j in cells):
+                    return True
+    return False
+
+
+class TestBitBoard(unittest.TestCase):
+    def test_wins_matches_brute_force(self):
+        rnd = random.Random(0)
+        for _ in range(500):
+            state = random_state(rnd, rnd.randint(0, 60))
+            bitboard = BitBoard.from_state(state)
+            for player in (HUMAN, COMP):
+                self.assertEqual(bitboard.wins(player), has_row(state, player))
+                self.assertEqual(wins(state, player), has_row(state, player))
+
+    def test_rows_do_not_wrap(self):
+        bitboard = BitBoard()
+        for x, y in ((0, 7), (0, 8), (0, 9), (1, 0), (1, 1)):
+            bitboard.make(x, y, COMP)
+        self.assertFalse(bitboard.wins(COMP))
+        for x, y in ((2, 2), (3, 1), (4, 0), (5, 9), (6, 8)):
+            bitboard.make(x, y, HUMAN)
+        self.assertFalse(bitboard.wins(HUMAN))
+
+    def test_incremental_rows_follow_make_and_unmake(self):
+        rnd = random.Random(1)
+        for _ in range(50):
+            bitboard = BitBoard()
+            cells = [(x, y) for x in range(10) for y in range(10)]
+            rnd.shuffle(cells)
+            moves = []
+            for x, y in cells[: rnd.randint(0, 100)]:
+                player = rnd.choice([HUMAN, COMP])
+                bitboard.make(x, y, player)
+                moves.append((x, y, player))
+                self.assertEqual(bitboard.last_move, (x, y, player))
+                for other in (HUMAN, COMP):
+                    self.assertEqual(bitboard.wins(other), bitboard.has_row(other))
+                if rnd.random() < 0.3:
+                    bitboard.unmake(*moves.pop())
+                    for other in (HUMAN, COMP):
+                        self.assertEqual(bitboard.wins(other), bitboard.has_row(other))
+
+    def test_last_move_wins(self):
+        bitboard = BitBoard()
+        for x in range(4):
+            bitboard.make(x, x + 1, HUMAN)
+        self.assertFalse(bitboard.last_move_wins())
+        bitboard.make(4, 5, HUMAN)
+        self.assertTrue(bitboard.last_move_wins())
+        self.assertEqual(bitboard.runs[HUMAN][bitboard.line_ids(4, 5)[2]], 5)
+        bitboard.unmake(4, 5, HUMAN)
+        self.assertFalse(bitboard.wins(HUMAN))
+
+    def test_make_unmake(self):
+        bitboard = BitBoard()
+        bitboard.make(3, 4, COMP)
+        self.assertNotIn([3, 4], bitboard.empty_cells())
+        bitboard.unmake(3, 4, COMP)
+        self.assertEqual(len(bitboard.empty_cells()), 100)
+
+
+def drawn_state() -> list:
+    """Полное поле без пяти в ряд ни у кого"""
+    return [[COMP if (x + 2 * y) % 4 < 2 else HUMAN for y in range(10)] for x in range(10)]
+
+
+class TestMinimax(unittest.TestCase):
+    def test_returns_empty_cell(self):
+        state = drawn_state()
+        state[0][0] = state[9][9] = 0
+        bitboard = BitBoard.from_state(state)
+        x, y, score = minimax(bitboard, 2, COMP)
+        self.assertIn((x, y), {(0, 0), (9, 9)})
+        self.assertEqual(bitboard.bits, BitBoard.from_state(state).bits)
+
+
+def four_in_row_state(player: int) -> list:
+    """Почти полное поле: у player четыре в ряд, свободны (0, 4) и (9, 9)"""
+    state = drawn_state()
+    state[0][:5] = [player] * 4 + [0]
+    state[9][9] = 0
+    return state
+
+
+class TestAlphaBeta(unittest.TestCase):
+    def test_avoids_own_row(self):
+        bitboard = BitBoard.from_state(four_in_row_state(COMP))
+        x, y, score = AlphaBeta().search(bitboard, COMP, time_budget=5)
+        self.assertEqual((x, y), (9, 9))
+        self.assertGreater(score, -WIN_SCORE + 10)
+
+    def test_forces_opponent_row(self):
+        bitboard = BitBoard.from_state(four_in_row_state(HUMAN))
+        x, y, score = AlphaBeta().search(bitboard, COMP, time_budget=5)
+        self.assertEqual((x, y), (9, 9))
+        self.assertGreater(score, WIN_SCORE - 10)
+
+    def test_agrees_with_minimax(self):
+        state = drawn_state()
+        for x, y in ((0, 0), (0, 5), (5, 5), (9, 9)):
+            state[x][y] = 0
+        bitboard = BitBoard.from_state(state)
+        expected = minimax(bitboard, 4, COMP)[2]
+        score = AlphaBeta().search(bitboard, COMP, time_budget=5)[2]
+        self.assertEqual((score > 0) - (score < 0), expected)
+
+    def test_quiet_move_far_from_stones(self):
+        # все клетки рядом с камнем достраивают ряд из двух, спасает только ход вдали
+        bitboard = BitBoard(size=5, number_for_win=2, radius=1)
+        bitboard.make(0, 0, COMP)
+        engine = AlphaBeta(table=TranspositionTable(8))
+        self.assertEqual(engine.negamax(bitboard, 1, -WIN_SCORE - 1, WIN_SCORE + 1, COMP, 1), 0)
+        self.assertEqual(engine.table.probe(bitboard, COMP)[2:], (0, (0, 2)))
+
+    def test_time_budget(self):
+        bitboard = BitBoard()
+        start = time.perf_counter()
+        x, y, score = AlphaBeta().search(bitboard, COMP, time_budget=0.2)
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertIn([x, y], bitboard.empty_cells())
+        self.assertEqual(bitboard.history, [])
+
+
+class TestCandidates(unittest.TestCase):
+    def test_sets_follow_make_and_unmake(self):
+        rnd = random.Random(2)
+        bitboard = BitBoard(radius=1)
+        self.assertEqual(len(bitboard.candidate_moves()), 100)
+        cells = rnd.sample([(x, y) for x in range(10) for y in range(10)], 30)
+        for i, (x, y) in enumerate(cells):
+            bitboard.make(x, y, COMP if i % 2 else HUMAN)
+            stones = set(cells[:i + 1])
+            near = {(a, b) for a in range(10) for b in range(10) if (a, b) not in stones
+                    and any(abs(a - c) <= 1 and abs(b - d) <= 1 for c, d in stones)}
+            self.assertEqual(bitboard.candidates, near)
+            self.assertEqual(bitboard.empty, {(a, b) for a in range(10) for b in range(10)} - stones)
+        for i, (x, y) in reversed(list(enumerate(cells))):
+            bitboard.unmake(x, y, COMP if i % 2 else HUMAN)
+        self.assertEqual(bitboard.candidates, set())
+        self.assertEqual(len(bitboard.empty), 100)
+
+    def test_is_empty(self):
+        bitboard = BitBoard()
+        bitboard.make(2, 3, COMP)
+        self.assertFalse(bitboard.is_empty(2, 3))
+        self.assertTrue(bitboard.is_empty(3, 2))
+        self.assertFalse(bitboard.is_empty(10, 0))
+
+
+class TestTransposition(unittest.TestCase):
+    def test_hash_is_incremental(self):
+        rnd = random.Random(3)
+        state = random_state(rnd, 30)
+        bitboard = BitBoard.from_state(state)
+        start = list(bitboard.hashes)
+        cells = rnd.sample([tuple(cell) for cell in bitboard.empty_cells()], 10)
+        for i, (x, y) in enumerate(cells):
+            bitboard.make(x, y, COMP if i % 2 else HUMAN)
+        for i, (x, y) in reversed(list(enumerate(cells))):
+            bitboard.unmake(x, y, COMP if i % 2 else HUMAN)
+        self.assertEqual(bitboard.hashes, start)
+
+    def test_move_order_does_not_matter(self):
+        first, second = BitBoard(), BitBoard()
+        for x, y, player in ((1, 2, COMP), (3, 4, HUMAN), (5, 6, COMP)):
+            first.make(x, y, player)
+        for x, y, player in ((5, 6, COMP), (3, 4, HUMAN), (1, 2, COMP)):
+            second.make(x, y, player)
+        self.assertEqual(first.hash, second.hash)
+
+    def test_symmetric_positions(self):
+        state = random_state(random.Random(5), 20)
+        canonical = BitBoard.from_state(state).canonical()[0]
+        for symmetry in range(SYMMETRIES):
+            image = [[0] * 10 for _ in range(10)]
+            for x in range(10):
+                for y in range(10):
+                    i, j = transform(x, y, 10, symmetry)
+                    image[i][j] = state[x][y]
+            self.assertEqual(BitBoard.from_state(image).canonical()[0], canonical)
+
+    def test_move_through_symmetry(self):
+        table = TranspositionTable(size_bits=8, symmetry=True)
+        bitboard = BitBoard()
+        bitboard.make(0, 1, COMP)
+        table.store(bitboard, HUMAN, 3, EXACT, 7, (0, 2))
+        mirrored = BitBoard()
+        mirrored.make(1, 0, COMP)
+        self.assertEqual(table.probe(mirrored, HUMAN), (3, EXACT, 7, (2, 0)))
+        self.assertIsNone(table.probe(mirrored, COMP))
+        self.assertEqual(table.hits, 1)
+        self.assertEqual(table.probes, 2)
+
+    def test_replacement_keeps_deeper_entry(self):
+        table = TranspositionTable(size_bits=0)
+        first, second = BitBoard(), BitBoard()
+        first.make(0, 0, COMP)
+        second.make(9, 9, COMP)
+        table.store(first, HUMAN, 5, EXACT, 0, None)
+        table.store(second, HUMAN, 2, EXACT, 0, None)
+        self.assertIsNotNone(table.probe(first, HUMAN))
+        table.new_search()
+        table.store(second, HUMAN, 2, EXACT, 0, None)
+        self.assertIsNone(table.probe(first, HUMAN))
+        self.assertEqual(table.overwrites, 1)
+
+    def test_search_with_table(self):
+        state = drawn_state()
+        for x, y in ((0, 0), (0, 5), (5, 5), (9, 9), (3, 7), (7, 2)):
+            state[x][y] = 0
+        plain = AlphaBeta()
+        expected = plain.search(BitBoard.from_state(state), COMP, time_budget=30)
+        table = TranspositionTable(size_bits=12, symmetry=True)
+        engine = AlphaBeta(table=table)
+        move = engine.search(BitBoard.from_state(state), COMP, time_budget=30)
+        self.assertEqual(move[2], expected[2])
+        self.assertLess(engine.nodes, plain.nodes)
+        self.assertGreater(table.hit_rate, 0)
+
+
+def line_mask(cells: str, mark: str) -> int:
+    return sum(1 << i for i, cell in enumerate(cells) if cell == mark)
+
+
+class TestPatternEvaluation(unittest.TestCase):
+    def danger(self, cells: str) -> int:
+        return line_danger(line_mask(cells, "x"), line_mask(cells, "o"), len(cells))
+
+    def test_patterns(self):
+        self.assertEqual(self.danger("..xxxx...."), 221)  # открытая четвёрка: два окна по четыре
+        self.assertEqual(self.danger("oxxxx....."), 111)
+        self.assertEqual(self.danger("xxxx......"), 111)
+        self.assertEqual(self.danger("xx.xx....."), 112)  # разорванная четвёрка не слабее закрытой
+        self.assertEqual(self.danger("x.xxx....."), 121)
+        self.assertEqual(self.danger("...xxx...."), 32)
+        self.assertEqual(self.danger("...xx....."), 4)
+        self.assertEqual(self.danger("oxxxxo...."), 0)
+        self.assertEqual(self.danger("..oxxx.o.."), 0)  # пять не поместится
+
+    def test_incremental_totals(self):
+        rnd = random.Random(11)
+        bitboard = PatternBoard.from_state(random_state(rnd, 40))
+        cells = [tuple(cell) for cell in bitboard.empty_cells()]
+        moves = [(x, y, rnd.choice((COMP, HUMAN))) for x, y in rnd.sample(cells, 20)]
+        for x, y, player in moves:
+            bitboard.make(x, y, player)
+            fresh = PatternBoard.from_state(self.to_state(bitboard))
+            self.assertEqual(bitboard.total_danger, fresh.total_danger)
+        for x, y, player in reversed(moves[5:]):
+            bitboard.unmake(x, y, player)
+        fresh = PatternBoard.from_state(self.to_state(bitboard))
+        self.assertEqual(bitboard.total_danger, fresh.total_danger)
+
+    @staticmethod
+    def to_state(bitboard: BitBoard) -> list:
+        def cell(x: int, y: int) -> int:
+            if bitboard.bits[COMP] & bitboard.bit(x, y):
+                return COMP
+            return HUMAN if bitboard.bits[HUMAN] & bitboard.bit(x, y) else 0
+
+        return [[cell(x, y) for y in range(10)] for x in range(10)]
+
+    def test_own_runs_are_bad(self):
+        bitboard = PatternBoard()
+        for y in range(3):
+            bitboard.make(4, 3 + y, COMP)
+        self.assertLess(pattern_evaluation(bitboard, COMP), 0)
+        self.assertGreater(pattern_evaluation(bitboard, HUMAN), 0)
+
+    def test_engine_keeps_stones_apart(self):
+        bitboard = PatternBoard()
+        bitboard.make(4, 4, COMP)
+        bitboard.make(0, 0, HUMAN)
+        x, y, score = AlphaBeta(pattern_evaluation, max_depth=2).search(bitboard, COMP, time_budget=5)
+        self.assertGreater(max(abs(x - 4), abs(y - 4)), 1)
+
+
+class TestParallelSearch(unittest.TestCase):
+    def test_same_move_for_any_worker_count(self):
+        bitboard = PatternBoard()
+        for x, y, player in ((4, 4, COMP), (5, 5, HUMAN), (3, 6, COMP)):
+            bitboard.make(x, y, player)
+        expected = AlphaBeta(pattern_evaluation, max_depth=2).search(bitboard, HUMAN, time_budget=60)
+        moves = []
+        for workers in (1, 3):
+            search = ParallelSearch(workers, pattern_evaluation, max_depth=2, seed=7)
+            moves.append(search.search(bitboard, HUMAN, time_budget=None))
+            search.close()
+            self.assertEqual(search.depth, 2)
+            self.assertGreater(search.nodes_per_second, 0)
+        self.assertEqual(moves[0], moves[1])
+        self.assertEqual(moves[0][2], expected[2])
+
+    def test_forces_opponent_row(self):
+        search = ParallelSearch(2, seed=1)
+        x, y, score = search.search(BitBoard.from_state(four_in_row_state(HUMAN)), COMP, time_budget=5)
+        search.close()
+        self.assertEqual((x, y), (9, 9))
+        self.assertGreater(score, WIN_SCORE - 10)
+
+
+class TestMCTS(unittest.TestCase):
+    def test_playout_finishes_game(self):
+        rnd = random.Random(4)
+        bitboard = BitBoard()
+        for _ in range(20):
+            winner = playout(bitboard, COMP, rnd)
+            self.assertIn(winner, (COMP, HUMAN, 0))
+        self.assertEqual(len(bitboard.empty), 100)
+        self.assertNotEqual(playout(BitBoard.from_state(four_in_row_state(COMP)), COMP, rnd), COMP)
+
+    def test_avoids_own_row(self):
+        bitboard = BitBoard.from_state(four_in_row_state(COMP))
+        x, y, score = MCTS(playouts=300).search(bitboard, COMP, time_budget=None)
+        self.assertEqual((x, y), (9, 9))
+
+    def test_forces_opponent_row(self):
+        bitboard = BitBoard.from_state(four_in_row_state(HUMAN))
+        x, y, score = MCTS(playouts=300).search(bitboard, COMP, time_budget=None)
+        self.assertEqual((x, y), (9, 9))
+        self.assertEqual(score, 1)
+
+    def test_tree_reuse(self):
+        bitboard = BitBoard()
+        tree = MCTS(playouts=400, seed=3)
+        tree.search(bitboard, COMP, time_budget=None)
+        move = max(tree.root.children, key=lambda cell: tree.root.children[cell].visits)
+        visits = tree.root.children[move].visits
+        bitboard.make(move[0], move[1], COMP)
+        tree.search(bitboard, HUMAN, time_budget=None)
+        self.assertEqual(tree.root.visits, visits + 400)
+        self.assertEqual(tree.root_moves, ((move[0], move[1], COMP),))
+
+    def test_root_parallel(self):
+        bitboard = BitBoard.from_state(four_in_row_state(HUMAN))
+        tree = MCTS(playouts=200, workers=2)
+        x, y, score = tree.search(bitboard, COMP, time_budget=None)
+        tree.close()
+        self.assertEqual((x, y), (9, 9))
+        self.assertEqual(tree.played, 200)
+
+    def test_root_parallel_reuses_trees(self):
+        bitboard = BitBoard()
+        tree = MCTS(playouts=100, workers=2)
+        for _ in range(3):
+            tree.search(bitboard, COMP, time_budget=None)
+        roots = [pool.submit(_root_visits).result() for pool in tree.pools]
+        tree.close()
+        # каждый процесс держит своё дерево и продолжает его с прошлого поиска
+        self.assertEqual(roots, [150, 150])
+
+    def test_needs_a_budget(self):
+        with self.assertRaises(ValueError):
+            MCTS().search(BitBoard(), COMP, time_budget=None)
+
+
+class TestOpeningBook(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "book.bin")
+        cls.entries = build_book(plies=1, move_time=0.05, endgames=3, endgame_empty=5, self_play_depth=1, seed=1)
+        write_book(cls.path, cls.entries)
+        cls.book = OpeningBook(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.book.close()
+        cls.directory.cleanup()
+
+    def test_file_layout(self):
+        # пустое поле с ходом компьютера и 15 классов первого хода человека, плюс эндшпили
+        self.assertEqual(self.book.entries, 1 + 15 + 3)
+        self.assertEqual(os.path.getsize(self.path), HEADER.size + 64 * SLOT.size)
+
+    def test_symmetric_openings(self):
+        corner, mirrored = BitBoard(), BitBoard()
+        corner.make(0, 0, HUMAN)
+        mirrored.make(9, 9, HUMAN)
+        x, y, score = self.book.lookup(corner, COMP)
+        self.assertEqual(self.book.lookup(mirrored, COMP), [9 - x, 9 - y, score])
+        self.assertIsNotNone(self.book.lookup(BitBoard(), COMP))
+
+    def test_unknown_position(self):
+        bitboard = BitBoard()
+        bitboard.make(0, 0, HUMAN)
+        bitboard.make(5, 5, COMP)
+        self.assertIsNone(self.book.lookup(bitboard, COMP))
+        self.assertIsNone(self.book.lookup(BitBoard(), HUMAN))
+
+    def test_endgames_are_solved(self):
+        endgames = [entry for entry in self.entries.values() if entry[2] == ENDGAME]
+        self.assertEqual(len(endgames), 3)
+        rnd = random.Random(1)
+        state = None
+        while state is None:
+            state = self_play_endgame(rnd, 10, 5, 5, depth=1)
+        expected = AlphaBeta(max_depth=5).search(state, COMP, time_budget=60)
+        self.assertEqual(self.book.lookup(state, COMP)[2], expected[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,33 +1,51 @@
 from math import inf as infinity
-from random import choice
 import platform
 import time
 from os import system
+from os.path import exists
+
+from bitboard import COMP, HUMAN, BitBoard
+from book import OpeningBook
+from engine import AlphaBeta
+from evaluation import PatternBoard, pattern_evaluation
+from mcts import MCTS
+from parallel import ParallelSearch
+from transposition import TranspositionTable
 
 """
 За основу взят код https://github.com/Cledersonbc/tic-tac-toe-minimax/blob/master/py_version/minimax.py
 но там 3х3
 """
 
-HUMAN = -1
-COMP = +1
-
 board_size = 10  # РАЗМЕР ИГРОВОГО ПОЛЯ
 number_for_win = 5  # СКОЛЬКО НУЖНО В РЯД ДЛЯ ПОБЕДЫ
 comp_set_move = None  # Точка выбора компьютера
+move_time = 1.0  # СКОЛЬКО СЕКУНД КОМПЬЮТЕР ДУМАЕТ НАД ХОДОМ
+workers = 1  # СКОЛЬКО ПРОЦЕССОВ ИЩУТ ХОД КОМПЬЮТЕРА
+search_method = "alphabeta"  # КАК КОМПЬЮТЕР ИЩЕТ ХОД: "alphabeta" или "mcts"
+book_path = "book.bin"  # ДЕБЮТЫ И ЭНДШПИЛИ, СОБИРАЮТСЯ КОМАНДОЙ python book.py book.bin
 
 board = [[0] * board_size for item in range(board_size)]  # создание игрового поля
+bitboard = PatternBoard(board_size, number_for_win)  # то же поле в виде битовых масок для поиска
+if search_method == "mcts":  # поиск хода компьютера
+    engine = MCTS(workers=workers)
+elif workers > 1:
+    engine = ParallelSearch(workers, pattern_evaluation, symmetry=True)
+else:
+    engine = AlphaBeta(pattern_evaluation, table=TranspositionTable(symmetry=True))
+book = OpeningBook(book_path) if exists(book_path) else None  # файл только отображается в память
 
 
 def evaluate(state):
     """
     Function to heuristic evaluation of state.
+    The game is reversed: who makes number_for_win in a row loses.
     :param state: the state of the current board
     :return: +1 if the computer wins; -1 if the human wins; 0 draw
     """
-    if wins(state, COMP):
+    if wins(state, HUMAN):
         score = +1
-    elif wins(state, HUMAN):
+    elif wins(state, COMP):
         score = -1
     else:
         score = 0
@@ -37,50 +55,15 @@ def evaluate(state):
 
 def wins(state, player):
     """
-    This function tests if a specific player wins. Possibilities:
-    * Three rows    [X X X] or [O O O]
-    * Three cols    [X X X] or [O O O]
-    * Two diagonals [X X X] or [O O O]
-    :param state: the state of the current board
+    This function tests if a specific player has number_for_win in a row:
+    horizontally, vertically or on any diagonal.
+    :param state: the BitBoard or the list state of the current board
     :param player: a human or a computer
     :return: True if the player wins
     """
-
-    def win_list(num_list, number_for_win):
-        """
-        Функция для подсчёта всех столбцов, строк и по диагонали
-        """
-        return [
-            num_list[num: num + number_for_win] for num in range(len(num_list) - 4)
-        ]
-
-    horizontally = []
-    vertically = []
-    diagonally_1 = []
-    diagonally_2 = []
-    count = 0
-    count_2 = board_size - 1
-    for w in range(board_size):
-        tmp1 = []
-        tmp2 = []
-        for z in range(board_size):
-            tmp1.append(state[w][z])
-            tmp2.append(state[z][w])
-        horizontally += win_list(tmp1, number_for_win)  # horizontally.append(tmp1)
-        vertically += win_list(tmp2, number_for_win)  # vertically.append(tmp2)
-        diagonally_1.append(tmp1[count])
-        diagonally_2.append(tmp2[count_2])
-        count += 1
-        count_2 -= 1
-
-    diagonally_1 = win_list(diagonally_1, number_for_win)
-    diagonally_2 = win_list(diagonally_2, number_for_win)
-
-    win_state = [*horizontally, *vertically, *diagonally_1, *diagonally_2]
-    if [player] * number_for_win in win_state:
-        return True
-    else:
-        return False
+    if not isinstance(state, BitBoard):
+        state = BitBoard.from_state(state, number_for_win)
+    return state.wins(player)
 
 
 def game_over(state):
@@ -95,9 +78,12 @@ def game_over(state):
 def empty_cells(state):
     """
     Each empty cell will be added into cells' list
-    :param state: the state of the current board
+    :param state: the BitBoard or the list state of the current board
     :return: a list of empty cells
     """
+    if isinstance(state, BitBoard):
+        return state.empty_cells()
+
     cells = []
 
     for x, row in enumerate(state):
@@ -114,10 +100,7 @@ def valid_move(x, y):
     :param y: Y coordinate
     :return: True if the board[x][y] is empty
     """
-    if [x, y] in empty_cells(board):
-        return True
-    else:
-        return False
+    return bitboard.is_empty(x, y)
 
 
 def valid_moves(board_size):
@@ -132,13 +115,15 @@ def valid_moves(board_size):
 
 def set_move(x, y, player):
     """
-    Set the move on board, if the coordinates are valid
+    Set the move on board, if the coordinates are valid.
+    The bitboard remembers it as the last move and updates only the lines through it.
     :param x: X coordinate
     :param y: Y coordinate
     :param player: the current player
     """
     if valid_move(x, y):
         board[x][y] = player
+        bitboard.make(x, y, player)
         return True
     else:
         return False
@@ -147,7 +132,7 @@ def set_move(x, y, player):
 def minimax(state, depth, player):
     """
     AI function that choice the best move
-    :param state: current state of the board
+    :param state: current BitBoard of the game
     :param depth: node index in the tree (0 <= depth <= 9),
     but never nine in this case (see ia_turn() function)
     :param player: an human or a computer
@@ -158,15 +143,16 @@ def minimax(state, depth, player):
     else:
         best = [-1, -1, +infinity]
 
+    # только последний ход мог создать новый ряд, счётчики линий уже обновлены в make
     if depth == 0 or game_over(state):
         score = evaluate(state)
         return [-1, -1, score]
 
     for cell in empty_cells(state):
         x, y = cell[0], cell[1]
-        state[x][y] = player
+        state.make(x, y, player)
         score = minimax(state, depth - 1, -player)
-        state[x][y] = 0
+        state.unmake(x, y, player)
         score[0], score[1] = x, y
 
         if player == COMP:
@@ -214,27 +200,25 @@ def render(state, c_choice, h_choice):
 
 def ai_turn(c_choice, h_choice):
     """
-    It calls the minimax function if the depth < 9,
-    else it choices a random coordinate.
+    It takes the move from the book if the position is there,
+    else calls the engine chosen by search_method for move_time seconds.
     :param c_choice: computer's choice X or O
     :param h_choice: human's choice X or O
     :return:
     """
     global comp_set_move
-    depth = len(empty_cells(board))
-    if depth == 0 or game_over(board):
+    depth = len(bitboard.empty)
+    if depth == 0 or game_over(bitboard):
         return
 
     clean()
     print(f"Computer turn [{c_choice}]")
     render(board, c_choice, h_choice)
 
-    if depth > 9:
-        x = choice(list(range(board_size)))  # выбираем случайную строку
-        y = choice(list(range(board_size)))  # выбираем случайный столб
-    else:
-        move = minimax(board, depth, COMP)
-        x, y = move[0], move[1]
+    move = book.lookup(bitboard, COMP) if book is not None else None
+    if move is None:
+        move = engine.search(bitboard, COMP, move_time)
+    x, y = move[0], move[1]
 
     set_move(x, y, COMP)
     comp_set_move = (x * board_size) + (y + 1)
@@ -251,8 +235,8 @@ def human_turn(c_choice, h_choice, comp_set_move):
     :param comp_set_move: shows computer selection
     :return:
     """
-    depth = len(empty_cells(board))
-    if depth == 0 or game_over(board):
+    depth = len(bitboard.empty)
+    if depth == 0 or game_over(bitboard):
         return
 
     # Dictionary of valid moves
@@ -318,7 +302,7 @@ def main():
             print("Bad choice")
 
     # Main loop of this game
-    while len(empty_cells(board)) > 0 and not game_over(board):
+    while bitboard.empty and not game_over(bitboard):
         if first == "N":
             ai_turn(c_choice, h_choice)
             first = ""
@@ -327,12 +311,12 @@ def main():
         ai_turn(c_choice, h_choice)
 
     # Game over message
-    if wins(board, COMP):
+    if wins(bitboard, COMP):
         clean()
         print(f"Human turn [{h_choice}]")
         render(board, c_choice, h_choice)
         print("COMP LOSE! YOU WIN!")
-    elif wins(board, HUMAN):
+    elif wins(bitboard, HUMAN):
         clean()
         print(f"Computer turn [{c_choice}]")
         render(board, c_choice, h_choice)
@@ -0,0 +1,103 @@
+"""
+Transposition table for the game search.
+
+The same position is reached through different move orders, so the result of
+searching it is stored under its Zobrist hash. The table has a fixed number
+of slots, a slot is chosen by the low bits of the hash and the full hash is
+kept to tell positions apart. With symmetry on, the canonical hash is used
+and the best move is stored as seen in the canonical orientation.
+"""
+from bitboard import COMP, inverse_symmetry, transform
+
+EXACT = 0  # the score is exact
+LOWER = 1  # the search failed high, the score is a lower bound
+UPPER = 2  # the search failed low, the score is an upper bound
+SIDE_KEY = 0x9E3779B97F4A7C15  # mixed into the hash when the computer is to move
+
+
+def position_key(state, player: int, symmetry: bool = True) -> tuple:
+    """
+    Hash of the position and the side to move
+    :param symmetry: use the canonical hash, the same for all 8 images of the position
+    :return: (key, symmetry that takes the board to the hashed orientation)
+    """
+    key, image = state.canonical() if symmetry else (state.hash, 0)
+    if player == COMP:
+        key ^= SIDE_KEY
+    return key, image
+
+
+class TranspositionTable:
+    """Fixed-size table of (hash, depth, bound, score, best move, generation)."""
+
+    def __init__(self, size_bits: int = 20, symmetry: bool = False) -> None:
+        """
+        :param size_bits: the table has 2 ** size_bits slots
+        :param symmetry: treat the 8 rotations and reflections of a position as one
+        """
+        self.mask = (1 << size_bits) - 1
+        self.entries = [None] * (1 << size_bits)
+        self.symmetry = symmetry
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0  # a slot of another position was taken
+
+    def new_search(self) -> None:
+        """Entries of earlier searches are replaced first"""
+        self.generation += 1
+
+    def probe(self, state, player: int):
+        """
+        :param state: current BitBoard of the game
+        :param player: the side to move
+        :return: (depth, bound, score, best move) or None, the move is (x, y) on the current board
+        """
+        self.probes += 1
+        key, symmetry = position_key(state, player, self.symmetry)
+        entry = self.entries[key & self.mask]
+        if entry is None or entry[0] != key:
+            return None
+        self.hits += 1
+        _, depth, bound, score, move, _ = entry
+        if move is not None and symmetry:
+            move = transform(move[0], move[1], state.size, inverse_symmetry(symmetry))
+        return depth, bound, score, move
+
+    def store(self, state, player: int, depth: int, bound: int, score: int, move) -> None:
+        """
+        Keep the result unless the slot holds a deeper search of another position of this search.
+        :param state: current BitBoard of the game
+        :param player: the side to move
+        :param depth: remaining depth the score was searched to
+        :param bound: EXACT, LOWER or UPPER
+        :param move: best move (x, y) or None
+        """
+        key, symmetry = position_key(state, player, self.symmetry)
+        slot = key & self.mask
+        entry = self.entries[slot]
+        if entry is not None and entry[0] != key:
+            if entry[5] == self.generation and entry[1] > depth:
+                return
+            self.overwrites += 1
+        if move is not None and symmetry:
+            move = transform(move[0], move[1], state.size, symmetry)
+        self.entries[slot] = (key, depth, bound, score, move, self.generation)
+        self.stores += 1
+
+    def clear(self) -> None:
+        self.entries = [None] * len(self.entries)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+        }